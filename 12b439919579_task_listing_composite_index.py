@@ -0,0 +1,34 @@
+"""Task listing composite index
+
+Revision ID: 12b439919579
+Revises: 9a98074590b7
+Create Date: 2026-10-18 11:27:40.502117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '12b439919579'
+down_revision: Union[str, None] = '9a98074590b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tasks_user_id_completed_priority_id', 'tasks',
+                    ['user_id', 'completed', 'priority', 'id'], unique=False)
+    # ix_tasks_id и ix_users_id дублируют первичный ключ,
+    # ix_tasks_user_id - префикс нового составного индекса
+    op.drop_index(op.f('ix_tasks_user_id'), table_name='tasks')
+    op.drop_index(op.f('ix_tasks_id'), table_name='tasks')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_tasks_id'), 'tasks', ['id'], unique=False)
+    op.create_index(op.f('ix_tasks_user_id'), 'tasks', ['user_id'], unique=False)
+    op.drop_index('ix_tasks_user_id_completed_priority_id', table_name='tasks')
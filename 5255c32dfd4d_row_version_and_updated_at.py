@@ -0,0 +1,34 @@
+"""Row version and updated_at
+
+Revision ID: 5255c32dfd4d
+Revises: 7d3e91c4b2a8
+Create Date: 2026-10-18 12:36:51.094213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5255c32dfd4d'
+down_revision: Union[str, None] = '7d3e91c4b2a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Обычный ALTER TABLE ADD COLUMN: пересоздание таблицы в batch-режиме удалило бы FTS-триггеры на tasks.
+    # SQLite не разрешает добавить колонку с DEFAULT CURRENT_TIMESTAMP, поэтому updated_at заполняется отдельно,
+    # а новые значения выставляет приложение (default/onupdate в моделях)
+    for table in ('users', 'tasks'):
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(f"UPDATE {table} SET updated_at = CURRENT_TIMESTAMP")
+
+
+def downgrade() -> None:
+    for table in ('tasks', 'users'):
+        op.drop_column(table, 'updated_at')
+        op.drop_column(table, 'version')
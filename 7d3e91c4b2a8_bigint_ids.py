@@ -0,0 +1,41 @@
+"""Bigint ids
+
+Revision ID: 7d3e91c4b2a8
+Revises: f58adf6e1395
+Create Date: 2026-10-18 12:10:37.214659
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3e91c4b2a8'
+down_revision: Union[str, None] = 'f58adf6e1395'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Snowflake-id (MODEL_IDS=snowflake) 64-битные. В SQLite INTEGER PRIMARY KEY уже 64-битный,
+# а пересоздание таблиц в batch-режиме удалило бы FTS-триггеры на tasks, поэтому меняется только PostgreSQL
+COLUMNS = [('tasks', 'user_id'), ('tasks', 'id'), ('users', 'id')]
+SEQUENCES = ['tasks_id_seq', 'users_id_seq']
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, column in COLUMNS:
+        op.alter_column(table, column, type_=sa.BigInteger(), existing_type=sa.Integer())
+    for sequence in SEQUENCES:
+        op.execute(f"ALTER SEQUENCE IF EXISTS {sequence} AS bigint")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for sequence in SEQUENCES:
+        op.execute(f"ALTER SEQUENCE IF EXISTS {sequence} AS integer")
+    for table, column in COLUMNS:
+        op.alter_column(table, column, type_=sa.Integer(), existing_type=sa.BigInteger())
@@ -0,0 +1,43 @@
+"""Tasks user_id ON DELETE CASCADE
+
+Revision ID: 9a98074590b7
+Revises: 6af689e2cb7e
+Create Date: 2026-10-18 11:02:14.318520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a98074590b7'
+down_revision: Union[str, None] = '6af689e2cb7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FK_NAME = 'fk_tasks_user_id_users'
+# Внешний ключ в начальной миграции без имени: в SQLite даем ему имя через naming_convention,
+# в PostgreSQL у него имя по умолчанию
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+POSTGRES_DEFAULT_FK_NAME = 'tasks_user_id_fkey'
+
+
+def _replace_fk(old_name, ondelete):
+    if op.get_bind().dialect.name == 'sqlite':
+        # SQLite не умеет ALTER CONSTRAINT - таблица пересоздается в batch-режиме
+        with op.batch_alter_table('tasks', naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(old_name, type_='foreignkey')
+            batch_op.create_foreign_key(FK_NAME, 'users', ['user_id'], ['id'], ondelete=ondelete)
+    else:
+        op.drop_constraint(old_name, 'tasks', type_='foreignkey')
+        op.create_foreign_key(FK_NAME, 'tasks', 'users', ['user_id'], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    old_name = FK_NAME if op.get_bind().dialect.name == 'sqlite' else POSTGRES_DEFAULT_FK_NAME
+    _replace_fk(old_name, 'CASCADE')
+
+
+def downgrade() -> None:
+    _replace_fk(FK_NAME, None)
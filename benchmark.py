@@ -0,0 +1,326 @@
+# app/benchmark.py
+# Нагрузочный тест роутеров пользователей и задач.
+#
+#   python -m app.benchmark --users 10000 --tasks 50000 --requests 2000 --output run.json
+#   python -m app.benchmark --mode uvicorn --workers 4 --output run_uvicorn.json
+#   python -m app.benchmark --compare base.json run.json
+#   python -m app.benchmark --measure-startup --lazy-routers --output startup.json
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+SEED_CHUNK = 5000
+
+
+# Процентиль по отсортированному списку (ближайший ранг)
+def percentile(values, q):
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, int(round(q / 100 * len(values))) - 1))
+    return values[index]
+
+
+def peak_rss_kb(who=resource.RUSAGE_SELF):
+    return resource.getrusage(who).ru_maxrss
+
+
+# Схема создается миграциями: create_all не создает FTS5-таблицу tasks_fts и ее триггеры
+def migrate(database_url, config_path='alembic.ini'):
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(config_path)
+    config.set_main_option('sqlalchemy.url', database_url)
+    command.upgrade(config, 'head')
+
+
+# Наполнение базы: основной объем + резерв строк для сценариев удаления
+def seed(database_url, users, tasks, user_reserve, task_reserve, alembic_ini='alembic.ini'):
+    from sqlalchemy import insert
+    from app.backend.db import create_db_engine
+    from app.models.registry import resolve_all
+
+    models = resolve_all()
+    User, Task = models['User'], models['Task']
+    migrate(database_url, alembic_ini)
+    engine = create_db_engine(database_url)
+
+    total_users = users + user_reserve
+    with engine.begin() as connection:
+        for start in range(1, total_users + 1, SEED_CHUNK):
+            connection.execute(insert(User), [
+                {'id': i, 'username': f'user{i}', 'firstname': 'Bench', 'lastname': 'User',
+                 'age': 18 + i % 60, 'slug': f'user{i}'}
+                for i in range(start, min(start + SEED_CHUNK, total_users + 1))
+            ])
+        for start in range(1, tasks + task_reserve + 1, SEED_CHUNK):
+            connection.execute(insert(Task), [
+                {'id': i, 'title': f'task {i}', 'content': f'benchmark task number {i}',
+                 'priority': i % 10, 'completed': i % 3 == 0, 'user_id': 1 + i % users, 'slug': f'task-{i}'}
+                for i in range(start, min(start + SEED_CHUNK, tasks + task_reserve + 1))
+            ])
+    engine.dispose()
+
+
+# Сценарии: (имя, метод, функция пути, функция тела). ctx хранит размеры данных и пулы id для удаления.
+def scenarios(ctx):
+    def any_user():
+        return random.randint(1, ctx['users'])
+
+    def any_task():
+        return random.randint(1, ctx['tasks'])
+
+    def new_user(prefix):
+        def body(i):
+            name = f'{prefix}{ctx["run"]}_{i}'
+            return {'username': name, 'firstname': 'New', 'lastname': 'User', 'age': 30}
+        return body
+
+    def new_task(i):
+        return {'title': f'new task {ctx["run"]} {i}', 'content': 'created by benchmark', 'priority': i % 10,
+                'completed': False, 'user_id': any_user(), 'slug': f'new-task-{ctx["run"]}-{i}'}
+
+    return [
+        ('user_m.all_users', 'GET', lambda i: '/users/?limit=50', None),
+        ('user_m.user_by_id', 'GET', lambda i: f'/users/{any_user()}', None),
+        ('user_m.user_by_slug', 'GET', lambda i: f'/users/slug/user{any_user()}', None),
+        ('user_m.export_users', 'GET', lambda i: '/users/export', None),
+        ('user_m.create_user', 'POST', lambda i: '/users/create', new_user('m')),
+        ('user_m.update_user', 'PUT', lambda i: f'/users/update/{any_user()}', lambda i: {'age': 18 + i % 60}),
+        ('user_m.delete_user', 'DELETE', lambda i: f'/users/delete/{ctx["user_pool"].pop()}', None),
+        ('user_r.read_users', 'GET', lambda i: '/users/users/?limit=50', None),
+        ('user_r.read_user', 'GET', lambda i: f'/users/users/{any_user()}', None),
+        ('user_r.create_user', 'POST', lambda i: '/users/users/', new_user('r')),
+        ('user_r.update_user', 'PUT', lambda i: f'/users/users/{any_user()}', lambda i: {'age': 18 + i % 60}),
+        ('user_r.delete', 'DELETE', lambda i: f'/users/users/{ctx["user_pool"].pop()}/tasks', None),
+        ('task_r.all_tasks', 'GET', lambda i: '/tasks/tasks/?limit=50', None),
+        ('task_r.all_tasks_filtered', 'GET', lambda i: f'/tasks/tasks/?limit=50&user_id={any_user()}&completed=false', None),
+        ('task_r.task_by_id', 'GET', lambda i: f'/tasks/tasks/{any_task()}', None),
+        ('task_r.search_tasks', 'GET', lambda i: f'/tasks/search?q=task+{any_task()}', None),
+        ('task_r.export_tasks', 'GET', lambda i: '/tasks/export', None),
+        ('task_r.create_task', 'POST', lambda i: '/tasks/tasks/', new_task),
+        ('task_r.update_task', 'PUT', lambda i: f'/tasks/tasks/{any_task()}',
+         lambda i: {'title': f'updated task {i}', 'content': 'updated by benchmark', 'priority': i % 10}),
+        ('task_r.delete_task', 'DELETE', lambda i: f'/tasks/tasks/{ctx["task_pool"].pop()}', None),
+    ]
+
+
+# Маршрут не смонтирован в приложении: пропускаем сценарий, а не считаем ошибки.
+# Редирект (например, 307 на путь со слешем) значит, что запрос попал не в тот обработчик
+def is_unmounted(response):
+    if response.status_code == 405 or 300 <= response.status_code < 400:
+        return True
+    return response.status_code == 404 and response.headers.get('content-type', '').startswith('application/json') \
+        and response.json() == {'detail': 'Not Found'}
+
+
+async def run_scenario(client, scenario, requests, concurrency):
+    name, method, path, body = scenario
+    warmup = await client.request(method, path(0), json=body(0) if body else None)
+    if is_unmounted(warmup):
+        return {'name': name, 'skipped': 'route is not mounted'}
+
+    latencies = []
+    errors = 0
+    counter = iter(range(1, requests + 1))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            try:
+                url, payload = path(i), body(i) if body else None
+            except IndexError:
+                # Пул id для удаления исчерпан
+                break
+            started = time.perf_counter()
+            response = await client.request(method, url, json=payload)
+            await response.aread()
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 300:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'name': name,
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'throughput_rps': len(latencies) / elapsed if elapsed else None,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+async def run_all(client, ctx, args):
+    results = []
+    for scenario in scenarios(ctx):
+        if args.only and not any(pattern in scenario[0] for pattern in args.only):
+            continue
+        result = await run_scenario(client, scenario, args.requests, args.concurrency)
+        print(json.dumps(result), file=sys.stderr)
+        results.append(result)
+    return results
+
+
+async def run_in_process(ctx, args):
+    import httpx
+    from app.main import app
+
+    # Исключение в обработчике - ответ 500 и ошибка сценария, а не остановка всего прогона
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            return await run_all(client, ctx, args)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def run_uvicorn(ctx, args):
+    import httpx
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(args.workers), '--log-level', 'warning'],
+        env=os.environ.copy()
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', timeout=60) as client:
+            for _ in range(100):
+                try:
+                    await client.get('/')
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            results = await run_all(client, ctx, args)
+    finally:
+        server.terminate()
+        server.wait()
+    # Пиковая память самого тяжелого из завершившихся воркеров
+    for result in results:
+        if 'peak_rss_kb' in result:
+            result['peak_rss_kb'] = peak_rss_kb(resource.RUSAGE_CHILDREN)
+    return results
+
+
+# Сравнение двух прогонов: изменение p95 и пропускной способности в процентах
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = {r['name']: r for r in json.load(f)['results'] if 'skipped' not in r}
+    with open(new_path) as f:
+        new = {r['name']: r for r in json.load(f)['results'] if 'skipped' not in r}
+
+    def change(a, b):
+        return f'{(b - a) / a * 100:+.1f}%' if a else 'n/a'
+
+    print(f'{"endpoint":32} {"p95 old":>10} {"p95 new":>10} {"p95":>8} {"rps":>8}')
+    for name in sorted(old.keys() & new.keys()):
+        a, b = old[name], new[name]
+        print(f'{name:32} {a["p95_ms"]:10.2f} {b["p95_ms"]:10.2f} '
+              f'{change(a["p95_ms"], b["p95_ms"]):>8} {change(a["throughput_rps"], b["throughput_rps"]):>8}')
+
+
+# Отчет о старте воркера: общее время импорта/первого ответа и самые медленные модули
+def print_startup(report):
+    print(f'lazy routers: {report["lazy_routers"]}', file=sys.stderr)
+    print(f'import app.main: {report["import_ms"]:.1f} ms, '
+          f'first request {report["path"]} -> {report["status"]}: {report["first_request_ms"]:.1f} ms', file=sys.stderr)
+    print(f'{"module":48} {"self ms":>9} {"cumul ms":>9}', file=sys.stderr)
+    for module in report['app_modules'] + report['top_modules']:
+        print(f'{module["module"]:48} {module["self_us"] / 1000:9.2f} {module["cumulative_us"] / 1000:9.2f}',
+              file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark user and task routers')
+    parser.add_argument('--mode', choices=['asgi', 'uvicorn'], default='asgi')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tasks', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=500, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--database', help='SQLite file to use instead of a temporary one')
+    parser.add_argument('--no-seed', action='store_true', help='use existing data in --database')
+    parser.add_argument('--alembic-ini', default='alembic.ini', help='alembic config used to create the schema')
+    parser.add_argument('--only', action='append', help='run endpoints whose name contains this string')
+    parser.add_argument('--output', help='write JSON results to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='diff two JSON result files')
+    parser.add_argument('--measure-startup', action='store_true',
+                        help='report per-module import time and time to first request')
+    parser.add_argument('--lazy-routers', action='store_true', help='measure startup with LAZY_ROUTERS=1')
+    parser.add_argument('--startup-path', default='/', help='path of the first request for --measure-startup')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.measure_startup:
+        from app.backend.startup import measure_startup
+
+        report = measure_startup(args.startup_path, lazy=args.lazy_routers)
+        print_startup(report)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+        return
+
+    # URL должен быть в окружении до импорта app.backend.db
+    path = args.database or os.path.join(tempfile.mkdtemp(prefix='taskmanager-bench-'), 'bench.db')
+    database_url = f'sqlite:///{path}'
+    os.environ['DATABASE_URL'] = database_url
+
+    # Запас на прогрев; пользователей удаляют два сценария (user_m и user_r)
+    task_reserve = args.requests + 1
+    user_reserve = 2 * task_reserve
+    if not args.no_seed:
+        seed(database_url, args.users, args.tasks, user_reserve, task_reserve, args.alembic_ini)
+
+    ctx = {
+        'run': int(time.time()),
+        'users': args.users,
+        'tasks': args.tasks,
+        # Каждый сценарий удаления забирает id из резерва, поэтому пулы не пересекаются
+        'user_pool': list(range(args.users + 1, args.users + user_reserve + 1)),
+        'task_pool': list(range(args.tasks + 1, args.tasks + task_reserve + 1)),
+    }
+    runner = run_uvicorn if args.mode == 'uvicorn' else run_in_process
+    results = asyncio.run(runner(ctx, args))
+
+    report = {
+        'mode': args.mode,
+        'workers': args.workers if args.mode == 'uvicorn' else 1,
+        'users': args.users,
+        'tasks': args.tasks,
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'database': database_url,
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
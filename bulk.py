@@ -0,0 +1,142 @@
+# app/backend/bulk.py
+from fastapi import HTTPException, status
+from sqlalchemy import select, insert, update, delete, or_
+from sqlalchemy.exc import IntegrityError
+
+# Ограничение размера пакета: один IN-запрос должен укладываться в лимит параметров SQLite
+BULK_MAX_ITEMS = 10000
+
+
+def check_bulk_size(items):
+    if not items:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty batch")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch is limited to {BULK_MAX_ITEMS} items"
+        )
+
+
+def _error(index, detail, id=None):
+    return {'index': index, 'id': id, 'status': 'error', 'detail': detail}
+
+
+def _ok(index, id, state):
+    return {'index': index, 'id': id, 'status': state, 'detail': None}
+
+
+def _fail_pending(results, positions, detail):
+    for index in positions:
+        results[index] = _error(index, detail)
+
+
+# Ссылки внешних ключей проверяются по одному IN-запросу на ключ: иначе одна строка
+# с несуществующей ссылкой валит весь executemany и ошибку получают все позиции
+async def _missing_references(db, model, rows):
+    missing = {}
+    for foreign_key in model.__table__.foreign_keys:
+        field = foreign_key.parent.key
+        values = {row[field] for row in rows if row.get(field) is not None}
+        if values:
+            target = foreign_key.column
+            missing[field] = values - set(await db.scalars(select(target).where(target.in_(values))))
+    return missing
+
+
+# Массовая вставка: проверка дублей одним IN-запросом по всем уникальным полям (включая slug,
+# на котором стоит уникальный индекс), вставка одним executemany в одной транзакции,
+# результат по каждой позиции входного списка
+async def bulk_insert(db, model, rows, unique_fields):
+    columns = [getattr(model, field) for field in unique_fields]
+    results = [None] * len(rows)
+    found = await db.execute(select(*columns).where(or_(
+        *(column.in_({row[field] for row in rows}) for column, field in zip(columns, unique_fields))
+    )))
+    existing = {field: set() for field in unique_fields}
+    for values in found:
+        for field, value in zip(unique_fields, values):
+            existing[field].add(value)
+    missing = await _missing_references(db, model, rows)
+
+    seen = {field: set() for field in unique_fields}
+    to_insert, positions = [], []
+    for index, row in enumerate(rows):
+        bad_reference = next((field for field, values in missing.items() if row.get(field) in values), None)
+        if bad_reference is not None:
+            results[index] = _error(index, f"{bad_reference} {row[bad_reference]} does not exist")
+            continue
+        for field in unique_fields:
+            value = row[field]
+            if value in existing[field]:
+                results[index] = _error(index, f"{field} '{value}' already exists")
+                break
+            if value in seen[field]:
+                results[index] = _error(index, f"Duplicate {field} '{value}' in request")
+                break
+        else:
+            for field in unique_fields:
+                seen[field].add(row[field])
+            to_insert.append(row)
+            positions.append(index)
+
+    if to_insert:
+        try:
+            stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+            ids = (await db.scalars(stmt, to_insert)).all()
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            _fail_pending(results, positions, f"Integrity error: {e.orig}")
+        else:
+            for index, id in zip(positions, ids):
+                results[index] = _ok(index, id, 'created')
+    return results
+
+
+# Массовое обновление по первичному ключу: существование проверяется одним IN-запросом
+async def bulk_update(db, model, rows):
+    results = [None] * len(rows)
+    existing = set(await db.scalars(select(model.id).where(model.id.in_({row['id'] for row in rows}))))
+
+    seen = set()
+    to_update, positions = [], []
+    for index, row in enumerate(rows):
+        id = row['id']
+        if id not in existing:
+            results[index] = _error(index, "Not found", id)
+        elif id in seen:
+            results[index] = _error(index, "Duplicate id in request", id)
+        elif len(row) == 1:
+            results[index] = _error(index, "Nothing to update", id)
+        else:
+            seen.add(id)
+            to_update.append(row)
+            positions.append(index)
+
+    if to_update:
+        try:
+            await db.execute(update(model), to_update)
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            _fail_pending(results, positions, f"Integrity error: {e.orig}")
+        else:
+            for index in positions:
+                results[index] = _ok(index, rows[index]['id'], 'updated')
+    return results
+
+
+# Массовое удаление одним DELETE ... WHERE id IN (...) RETURNING id
+async def bulk_delete(db, model, ids):
+    stmt = (
+        delete(model)
+        .where(model.id.in_(set(ids)))
+        .returning(model.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = set((await db.scalars(stmt)).all())
+    await db.commit()
+    return [
+        _ok(index, id, 'deleted') if id in deleted else _error(index, "Not found", id)
+        for index, id in enumerate(ids)
+    ]
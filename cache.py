@@ -0,0 +1,174 @@
+# app/backend/cache.py
+import abc
+import itertools
+import os
+import time
+from collections import OrderedDict
+
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '10000'))
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '60'))
+# При чтении с реплик - не меньше их отставания: строку, прочитанную вскоре после
+# инвалидации, не кладем в кэш, она могла прийти с реплики, еще не получившей запись
+USER_CACHE_FILL_DELAY = float(os.getenv('USER_CACHE_FILL_DELAY', '0'))
+# Сколько помнить инвалидацию id: фоновый прогрев обычно выполняется намного быстрее
+USER_CACHE_GENERATION_TTL = float(os.getenv('USER_CACHE_GENERATION_TTL', '60'))
+
+
+# Интерфейс бэкенда кэша. Методы асинхронные, чтобы общий бэкенд (Redis, memcached)
+# можно было подключить без изменения роутеров.
+class CacheBackend(abc.ABC):
+    @abc.abstractmethod
+    async def get(self, key):
+        ...
+
+    @abc.abstractmethod
+    async def set(self, key, value):
+        ...
+
+    @abc.abstractmethod
+    async def delete(self, *keys):
+        ...
+
+    @abc.abstractmethod
+    async def clear(self):
+        ...
+
+    def stats(self):
+        return {}
+
+
+# LRU-кэш в памяти процесса с TTL. Каждый воркер держит свою копию,
+# поэтому TTL ограничивает время, в течение которого другие воркеры видят старые данные.
+class LRUCache(CacheBackend):
+    def __init__(self, maxsize=1024, ttl=60.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+
+    async def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires, value = entry
+        if expires <= self.clock():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def set(self, key, value):
+        self._data[key] = (self.clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, *keys):
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': 'lru',
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Словарь колонок ORM-объекта: в кэше не храним объекты, привязанные к сессии
+def row_to_dict(obj):
+    return {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
+
+
+# Read-through кэш пользователей. Запись по slug хранит только id,
+# поэтому для инвалидации достаточно знать id пользователя.
+class UserCache:
+    def __init__(self, backend, fill_delay=0, clock=time.monotonic, generation_ttl=USER_CACHE_GENERATION_TTL):
+        self.backend = backend
+        self.fill_delay = fill_delay
+        self.clock = clock
+        self.generation_ttl = max(generation_ttl, fill_delay)
+        # Последняя инвалидация по id: (номер, время), от старых к новым.
+        # Номер инвалидации не дает фоновому прогреву перезаписать кэш устаревшей строкой.
+        # Номера растут общим счетчиком, поэтому вместо забытых записей generation() отдает
+        # номер последней удаленной: прогрев, начатый до нее, просто пропускается
+        self._invalidations = OrderedDict()
+        self._counter = itertools.count(1)
+        self._floor = 0
+
+    # Удаляем инвалидации старше generation_ttl, чтобы словарь не рос с числом пользователей
+    def _prune(self):
+        deadline = self.clock() - self.generation_ttl
+        while self._invalidations:
+            generation, invalidated_at = next(iter(self._invalidations.values()))
+            if invalidated_at > deadline:
+                break
+            self._invalidations.popitem(last=False)
+            self._floor = generation
+
+    def _can_fill(self, user_id):
+        if not self.fill_delay:
+            return True
+        entry = self._invalidations.get(user_id)
+        return entry is None or self.clock() - entry[1] >= self.fill_delay
+
+    async def by_id(self, user_id, load):
+        key = f'user:id:{user_id}'
+        user = await self.backend.get(key)
+        if user is None:
+            user = await load()
+            if user is not None and self._can_fill(user_id):
+                await self.backend.set(key, user)
+        return user
+
+    async def by_slug(self, slug, load):
+        user_id = await self.backend.get(f'user:slug:{slug}')
+        if user_id is not None:
+            user = await self.backend.get(f'user:id:{user_id}')
+            if user is not None and user['slug'] == slug:
+                return user
+        user = await load()
+        if user is not None and self._can_fill(user['id']):
+            await self.backend.set(f'user:id:{user["id"]}', user)
+            await self.backend.set(f'user:slug:{slug}', user['id'])
+        return user
+
+    async def invalidate(self, *user_ids):
+        now = self.clock()
+        for user_id in user_ids:
+            self._invalidations[user_id] = (next(self._counter), now)
+            self._invalidations.move_to_end(user_id)
+        self._prune()
+        await self.backend.delete(*(f'user:id:{user_id}' for user_id in user_ids))
+
+    def generation(self, user_id):
+        entry = self._invalidations.get(user_id)
+        return self._floor if entry is None else entry[0]
+
+    # Прогрев после записи; пропускается, если id успели инвалидировать еще раз
+    async def warm(self, user, generation):
+        self._prune()
+        if self.generation(user['id']) == generation:
+            await self.backend.set(f'user:id:{user["id"]}', user)
+
+    def stats(self):
+        return self.backend.stats()
+
+
+user_cache = UserCache(LRUCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL), fill_delay=USER_CACHE_FILL_DELAY)
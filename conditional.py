@@ -0,0 +1,82 @@
+# app/backend/conditional.py
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import HTTPException, Response, status
+
+
+def _get(row, key):
+    return row[key] if isinstance(row, dict) else getattr(row, key)
+
+
+# Сильный ETag: id и версия строки однозначно определяют ее содержимое
+def make_etag(row):
+    return f'"{_get(row, "id")}-{_get(row, "version")}"'
+
+
+def _last_modified(row):
+    updated_at = _get(row, 'updated_at')
+    if updated_at is None:
+        return None
+    # SQLite хранит CURRENT_TIMESTAMP в UTC без часового пояса
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return updated_at.replace(microsecond=0)
+
+
+def validator_headers(row):
+    headers = {'ETag': make_etag(row)}
+    last_modified = _last_modified(row)
+    if last_modified is not None:
+        headers['Last-Modified'] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def set_validators(response, row):
+    response.headers.update(validator_headers(row))
+
+
+def _tags(header):
+    return [tag.strip() for tag in header.split(',') if tag.strip()]
+
+
+def _is_fresh(request, row):
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        # Для If-None-Match сравнение слабое: W/ не учитываем
+        etag = make_etag(row)
+        return any(tag == '*' or tag.removeprefix('W/') == etag for tag in _tags(if_none_match))
+
+    # If-Modified-Since учитывается только без If-None-Match
+    if_modified_since = request.headers.get('if-modified-since')
+    last_modified = _last_modified(row)
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified <= since
+
+
+# 304 без тела, если у клиента актуальная версия; иначе None и заголовки ставятся на response
+def not_modified(request, response, row):
+    if _is_fresh(request, row):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(row))
+    set_validators(response, row)
+    return None
+
+
+# Версия из If-Match для оптимистичной блокировки: None - проверка не нужна.
+# Принимаются только сильные ETag этой же строки, иначе 412.
+def expected_version(if_match, row_id):
+    if if_match is None or if_match.strip() == '*':
+        return None
+    tags = _tags(if_match)
+    if len(tags) == 1 and not tags[0].startswith('W/'):
+        tag_id, _, version = tags[0].strip('"').partition('-')
+        if tag_id == str(row_id) and version.isdigit():
+            return int(version)
+    raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="If-Match does not match the resource")
@@ -0,0 +1,75 @@
+# app/backend/crud.py
+from fastapi import HTTPException, status
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+
+# Обновление строки по id одним запросом UPDATE ... RETURNING (SQLite >= 3.35, PostgreSQL).
+# Ноль затронутых строк означает, что записи нет -> 404.
+# expected_version (из If-Match) добавляет условие на версию строки: чужое изменение -> 412.
+# commit=False - транзакцией управляет вызывающий (групповой коммит): ни commit, ни rollback.
+async def update_returning(db, model, row_id, values, detail="Not found", expected_version=None, commit=True):
+    columns = model.__table__.columns
+    if values:
+        stmt = (
+            update(model)
+            .where(model.id == row_id)
+            .values(**values)
+            .returning(*columns)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        # Обновлять нечего - просто читаем строку
+        stmt = select(*columns).where(model.id == row_id)
+    if expected_version is not None:
+        stmt = stmt.where(model.version == expected_version)
+
+    row = (await db.execute(stmt)).mappings().first()
+    if row is None:
+        if commit:
+            await db.rollback()
+        # Лишний запрос только на неуспешном пути: отличаем "нет строки" от "другая версия"
+        if expected_version is not None and await db.scalar(select(model.id).where(model.id == row_id)):
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED,
+                                detail="Resource was modified by another request")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+    if commit:
+        await db.commit()
+    return dict(row)
+
+
+# Удаление строки по id одним запросом DELETE ... RETURNING id.
+# Зависимые строки удаляет сама БД через ON DELETE CASCADE.
+async def delete_returning(db, model, row_id, detail="Not found"):
+    stmt = (
+        delete(model)
+        .where(model.id == row_id)
+        .returning(model.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = (await db.execute(stmt)).scalar_one_or_none()
+    if deleted is None:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+    await db.commit()
+    return deleted
+
+
+# Вставка или обновление одним запросом INSERT ... ON CONFLICT (...) DO UPDATE ... RETURNING.
+# Уникальный индекс решает гонку вместо предварительного SELECT.
+async def upsert_returning(db, model, values, index_elements):
+    insert = postgresql_insert if db.bind.dialect.name == 'postgresql' else sqlite_insert
+    stmt = insert(model).values(**values)
+    set_ = {key: stmt.excluded[key] for key in values if key not in index_elements}
+    # onupdate колонок (version, updated_at) не применяется к ON CONFLICT DO UPDATE - добавляем явно
+    for column in model.__table__.columns:
+        if column.onupdate is not None and column.onupdate.is_clause_element and column.key not in set_:
+            set_[column.key] = column.onupdate.arg
+    stmt = stmt.on_conflict_do_update(
+        index_elements=index_elements, set_=set_
+    ).returning(*model.__table__.columns)
+
+    row = (await db.execute(stmt)).mappings().one()
+    await db.commit()
+    return dict(row)
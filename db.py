@@ -1,11 +1,159 @@
 # app/backend/db.py
-from sqlalchemy import create_engine
+import itertools
+import os
+
+from sqlalchemy import BigInteger, Integer, create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
-DATABASE_URL = 'sqlite:///database.db'
+from app.backend.id_allocator import SnowflakeAllocator
+
+# Настройки подключения берутся из окружения
+DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///taskmanager.db')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+
+# PRAGMA для SQLite: WAL позволяет читателям не ждать писателя,
+# foreign_keys включает ON DELETE CASCADE (по умолчанию в SQLite выключено)
+SQLITE_PRAGMAS = {
+    'foreign_keys': 'ON',
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000')),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', '-64000')),
+}
+
+# Реплики для чтения: URL через запятую. Для локальной проверки SQLITE_READ_REPLICAS=N
+# открывает N пулов read-only соединений к тому же файлу (в режиме WAL читатели не ждут писателя)
+DATABASE_REPLICA_URLS = [url for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url]
+SQLITE_READ_REPLICAS = int(os.getenv('SQLITE_READ_REPLICAS', '0'))
+
+# Режим журнала - свойство файла базы, read-only соединение его не меняет
+SQLITE_REPLICA_PRAGMAS = {name: value for name, value in SQLITE_PRAGMAS.items() if name != 'journal_mode'}
+
+# Источник первичных ключей моделей: автоинкремент БД или Snowflake-id без обращения к БД.
+# Snowflake-id 64-битные: в SQLite INTEGER PRIMARY KEY подходит, в PostgreSQL нужен BIGINT.
+MODEL_IDS = os.getenv('MODEL_IDS', 'database')
+
+# Асинхронные драйверы для синхронных URL
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'postgres': 'postgresql+asyncpg',
+}
+
+
+def make_async_url(url):
+    # sqlite:///x.db -> sqlite+aiosqlite:///x.db, postgresql://... -> postgresql+asyncpg://...
+    url = make_url(url)
+    if url.drivername in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[url.drivername])
+    return url
+
+
+def is_sqlite(url):
+    return make_url(url).get_backend_name() == 'sqlite'
+
+
+# sqlite:///x.db -> sqlite:///file:x.db?mode=ro&uri=true
+def read_only_sqlite_url(url):
+    url = make_url(url)
+    return url.set(database=f'file:{url.database}', query={**url.query, 'mode': 'ro', 'uri': 'true'})
+
+
+def engine_options(url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                   pool_recycle=DB_POOL_RECYCLE):
+    url = make_url(url)
+    options = {'pool_pre_ping': True}
+    if url.get_backend_name() == 'sqlite':
+        options['connect_args'] = {'check_same_thread': False}
+        # База в памяти живет на одном соединении, размер пула не применим
+        if url.database in (None, '', ':memory:'):
+            return options
+    options.update(pool_size=pool_size, max_overflow=max_overflow, pool_recycle=pool_recycle)
+    return options
+
+
+def set_sqlite_pragmas(engine, pragmas=None):
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
 
-engine = create_engine('sqlite:///taskmanager.db')
+
+# Драйвер sqlite3 сам решает, когда начать транзакцию, и не знает о SAVEPOINT:
+# RELEASE первой точки сохранения у него фиксирует всю транзакцию. BEGIN выдаем сами,
+# тогда begin_nested() работает как в PostgreSQL. Только для движка группового коммита:
+# его сессии только пишут, поэтому BEGIN IMMEDIATE сразу берет блокировку записи и ждет ее
+# по busy_timeout, а не падает с "database is locked" при повышении чтения до записи
+def set_sqlite_transactions(engine, begin='BEGIN IMMEDIATE'):
+    @event.listens_for(engine, 'connect')
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def _begin(connection):
+        connection.exec_driver_sql(begin)
+
+
+def create_db_engine(url=DATABASE_URL, **pool_options):
+    engine = create_engine(url, **engine_options(url, **pool_options))
+    if is_sqlite(url):
+        set_sqlite_pragmas(engine)
+    return engine
+
+
+def create_async_db_engine(url=DATABASE_URL, pragmas=None, savepoints=False, **pool_options):
+    engine = create_async_engine(make_async_url(url), **engine_options(url, **pool_options))
+    if is_sqlite(url):
+        set_sqlite_pragmas(engine.sync_engine, pragmas)
+        if savepoints:
+            set_sqlite_transactions(engine.sync_engine)
+    return engine
+
+
+def replica_urls(primary=DATABASE_URL):
+    if DATABASE_REPLICA_URLS:
+        return DATABASE_REPLICA_URLS
+    if SQLITE_READ_REPLICAS and is_sqlite(primary) and make_url(primary).database not in (None, '', ':memory:'):
+        return [read_only_sqlite_url(primary)] * SQLITE_READ_REPLICAS
+    return []
+
+
+# Тип первичных и внешних ключей: snowflake-id не помещаются в int4 PostgreSQL.
+# В SQLite INTEGER PRIMARY KEY и так 64-битный rowid, а BIGINT лишил бы его автоинкремента
+ID_TYPE = BigInteger().with_variant(Integer, 'sqlite')
+
+
+def model_id_default():
+    # None - id выдает база данных
+    return SnowflakeAllocator().next_id if MODEL_IDS == 'snowflake' else None
+
+
+engine = create_db_engine()
 Session = sessionmaker(bind=engine)
 
+# Асинхронный движок и фабрика сессий для роутеров
+async_engine = create_async_db_engine()
+async_session = async_sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+
+# Сессии реплик выдаются по кругу; без реплик чтение идет в основную базу
+replica_engines = [create_async_db_engine(url, SQLITE_REPLICA_PRAGMAS if is_sqlite(url) else None)
+                   for url in replica_urls()]
+replica_sessions = [async_sessionmaker(bind=replica, class_=AsyncSession, expire_on_commit=False)
+                    for replica in replica_engines]
+_replica_cycle = itertools.cycle(replica_sessions)
+
+
+def read_session():
+    return next(_replica_cycle)() if replica_sessions else async_session()
+
 class Base(DeclarativeBase):
     pass
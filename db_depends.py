@@ -0,0 +1,17 @@
+# app/backend/db_depends.py
+from fastapi import Request
+
+from app.backend.db import async_session, read_session
+from app.backend.replicas import read_from_primary
+
+
+# Зависимость FastAPI: одна AsyncSession на запрос
+async def get_db():
+    async with async_session() as db:
+        yield db
+
+
+# Сессия для GET-обработчиков: реплика, а сразу после записи этого клиента - основная база
+async def get_read_db(request: Request):
+    async with (async_session() if read_from_primary(request) else read_session()) as db:
+        yield db
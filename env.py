@@ -1,3 +1,4 @@
+import os
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
@@ -18,11 +19,15 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
-from app.backend.db import Base
-from app.models.user import User
-from app.models.task import Task
+from app.backend.db import Base, DATABASE_URL
+from app.models.registry import resolve_all
+resolve_all()
 target_metadata = Base.metadata
 
+# URL из окружения имеет приоритет над alembic.ini
+if os.getenv('DATABASE_URL'):
+    config.set_main_option('sqlalchemy.url', DATABASE_URL)
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -0,0 +1,64 @@
+# app/backend/export.py
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from app.backend.db import read_session
+
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+# Даты (updated_at) - в ISO 8601, как их отдает API
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def _ndjson_chunk(rows):
+    return ''.join(json.dumps(dict(row), ensure_ascii=False, default=_json_default) + '\n' for row in rows)
+
+
+def _csv_chunk(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+# Построчная выгрузка таблицы: строки приходят с сервера пачками по EXPORT_BATCH_SIZE,
+# поэтому память не зависит от размера таблицы.
+# Сессия (реплики, если они настроены) открывается внутри генератора: сессия из get_db закрывается до начала стриминга.
+async def stream_table(model, fmt):
+    columns = list(model.__table__.columns)
+    stmt = (
+        select(*columns)
+        .order_by(*model.__table__.primary_key.columns)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    async with read_session() as db:
+        result = await db.stream(stmt)
+        if fmt == 'csv':
+            yield _csv_chunk([[column.key for column in columns]])
+            async for rows in result.partitions():
+                yield _csv_chunk(rows)
+        else:
+            async for rows in result.mappings().partitions():
+                yield _ndjson_chunk(rows)
+
+
+def export_response(model, fmt):
+    return StreamingResponse(
+        stream_table(model, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{model.__tablename__}.{fmt}"'}
+    )
@@ -0,0 +1,83 @@
+"""Tasks full-text search
+
+Revision ID: f58adf6e1395
+Revises: 12b439919579
+Create Date: 2026-10-18 11:48:05.771902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f58adf6e1395'
+down_revision: Union[str, None] = '12b439919579'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Внешнее содержимое FTS5: индекс хранит только токены, текст читается из tasks
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE tasks_fts USING fts5(
+        title, content, content='tasks', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER tasks_fts_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_fts_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_fts_au AFTER UPDATE OF title, content ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO tasks_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    # Индексируем уже существующие задачи
+    "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS tasks_fts_au",
+    "DROP TRIGGER IF EXISTS tasks_fts_ad",
+    "DROP TRIGGER IF EXISTS tasks_fts_ai",
+    "DROP TABLE IF EXISTS tasks_fts",
+]
+
+# В PostgreSQL индекс по выражению поддерживается самой БД, триггеры не нужны
+POSTGRES_UPGRADE = [
+    """
+    CREATE INDEX ix_tasks_fts ON tasks USING gin (
+        to_tsvector('simple', coalesce(tasks.title, '') || ' ' || coalesce(tasks.content, ''))
+    )
+    """,
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_tasks_fts",
+]
+
+
+def _run(statements):
+    for statement in statements:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        _run(POSTGRES_UPGRADE)
+    else:
+        _run(SQLITE_UPGRADE)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        _run(POSTGRES_DOWNGRADE)
+    else:
+        _run(SQLITE_DOWNGRADE)
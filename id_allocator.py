@@ -0,0 +1,84 @@
+# app/backend/id_allocator.py
+# Выдача уникальных id без обращения к БД: для учебных приложений module_16_*,
+# UserStore и (по желанию) SQLAlchemy-моделей
+import itertools
+import os
+import threading
+import time
+
+# Настройки для нескольких воркеров: номер воркера и их общее число
+WORKER_ID = os.getenv('WORKER_ID')
+WORKER_COUNT = int(os.getenv('WORKER_COUNT', '1'))
+ID_ALLOCATOR = os.getenv('ID_ALLOCATOR', 'counter')  # 'counter' или 'snowflake'
+
+
+def _worker_id(max_id):
+    # Без WORKER_ID берем pid: уникальность между воркерами тогда не гарантирована
+    if WORKER_ID is not None:
+        return int(WORKER_ID) % (max_id + 1)
+    return os.getpid() % (max_id + 1)
+
+
+# Атомарный счетчик без блокировок: next() у itertools.count выполняется целиком под GIL.
+# С шагом step воркер k выдает k+1, k+1+step, ... - id разных воркеров не пересекаются.
+class CounterAllocator:
+    def __init__(self, start=1, step=1):
+        self.start = start
+        self.step = step
+        self._counter = itertools.count(start, step)
+
+    def next_id(self):
+        return next(self._counter)
+
+    @classmethod
+    def for_worker(cls, start=1, worker_index=None, worker_count=WORKER_COUNT):
+        worker_index = _worker_id(worker_count - 1) if worker_index is None else worker_index
+        return cls(start + worker_index, worker_count)
+
+
+# 64-битные id, упорядоченные по времени (схема Snowflake):
+# 41 бит - миллисекунды от EPOCH_MS, 10 бит - номер воркера, 12 бит - номер в пределах миллисекунды.
+# Блокировка нужна только для пары (время, номер) и почти никогда не конкурирует.
+class SnowflakeAllocator:
+    EPOCH_MS = 1704067200000  # 2024-01-01 UTC
+    WORKER_BITS = 10
+    SEQUENCE_BITS = 12
+    MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+    MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+    def __init__(self, worker_id=None, clock=time.time):
+        self.worker_id = _worker_id(self.MAX_WORKER_ID) if worker_id is None else worker_id
+        if not 0 <= self.worker_id <= self.MAX_WORKER_ID:
+            raise ValueError(f'worker_id must be in 0..{self.MAX_WORKER_ID}')
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _now_ms(self):
+        return int(self.clock() * 1000) - self.EPOCH_MS
+
+    def next_id(self):
+        with self._lock:
+            now = self._now_ms()
+            # Часы ушли назад - продолжаем с последней выданной миллисекунды
+            if now <= self._last_ms:
+                now = self._last_ms
+                self._sequence = (self._sequence + 1) & self.MAX_SEQUENCE
+                if self._sequence == 0:
+                    # Номера в этой миллисекунде кончились - ждем следующую
+                    while now <= self._last_ms:
+                        now = self._now_ms()
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return (now << (self.WORKER_BITS + self.SEQUENCE_BITS)) \
+                | (self.worker_id << self.SEQUENCE_BITS) | self._sequence
+
+
+def make_allocator(kind=ID_ALLOCATOR, start=1):
+    if kind == 'snowflake':
+        return SnowflakeAllocator()
+    if kind == 'counter':
+        return CounterAllocator.for_worker(start) if WORKER_COUNT > 1 else CounterAllocator(start)
+    raise ValueError(f'Unknown id allocator: {kind}')
@@ -0,0 +1,117 @@
+# app/backend/idempotency.py
+import asyncio
+import hashlib
+import json
+import os
+
+from app.backend.cache import LRUCache
+
+IDEMPOTENCY_TTL = float(os.getenv('IDEMPOTENCY_TTL', '86400'))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv('IDEMPOTENCY_CACHE_SIZE', '10000'))
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] != 'http.request':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            break
+    return b''.join(chunks)
+
+
+async def _send_json(send, status, content, headers=()):
+    body = json.dumps(content).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()), *headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+# Повтор POST с тем же заголовком Idempotency-Key получает сохраненный ответ
+# без повторного выполнения обработчика. Одновременные повторы ждут первый запрос.
+# Бэкенд - любой CacheBackend: LRU в памяти воркера или общий для всех воркеров.
+class IdempotencyMiddleware:
+    def __init__(self, app, backend=None, methods=('POST',)):
+        self.app = app
+        self.backend = backend or LRUCache(maxsize=IDEMPOTENCY_CACHE_SIZE, ttl=IDEMPOTENCY_TTL)
+        self.methods = methods
+        self._in_flight = {}
+
+    async def __call__(self, scope, receive, send):
+        key = None
+        if scope['type'] == 'http' and scope['method'] in self.methods:
+            key = dict(scope['headers']).get(b'idempotency-key')
+        if not key:
+            await self.app(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        cache_key = f'idempotency:{scope["method"]}:{scope["path"]}:{key.decode("latin-1")}'
+
+        while True:
+            cached = await self.backend.get(cache_key)
+            if cached is not None:
+                await self._replay(send, cached, fingerprint)
+                return
+            pending = self._in_flight.get(cache_key)
+            if pending is None:
+                break
+            await pending.wait()
+
+        done = self._in_flight[cache_key] = asyncio.Event()
+        try:
+            await self._run_and_store(scope, body, send, cache_key, fingerprint)
+        finally:
+            del self._in_flight[cache_key]
+            done.set()
+
+    async def _replay(self, send, cached, fingerprint):
+        if cached['fingerprint'] != fingerprint:
+            await _send_json(send, 422, {'detail': 'Idempotency-Key was already used with a different request body'})
+            return
+        headers = [(name.encode('latin-1'), value.encode('latin-1')) for name, value in cached['headers']]
+        await send({
+            'type': 'http.response.start',
+            'status': cached['status'],
+            'headers': headers + [(b'idempotent-replayed', b'true')],
+        })
+        await send({'type': 'http.response.body', 'body': cached['body']})
+
+    async def _run_and_store(self, scope, body, send, cache_key, fingerprint):
+        delivered = False
+
+        async def receive():
+            nonlocal delivered
+            if delivered:
+                # Тело уже прочитано: дальше ждем только отключения клиента
+                await asyncio.Event().wait()
+            delivered = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        response = {'status': 500, 'headers': [], 'body': []}
+
+        async def send_and_capture(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+                response['headers'] = [(name.decode('latin-1'), value.decode('latin-1'))
+                                       for name, value in message.get('headers', [])]
+            elif message['type'] == 'http.response.body':
+                response['body'].append(message.get('body', b''))
+            await send(message)
+
+        await self.app(scope, receive, send_and_capture)
+
+        # Ошибки сервера не сохраняем: клиент должен иметь возможность повторить запрос
+        if response['status'] < 500:
+            await self.backend.set(cache_key, {
+                'fingerprint': fingerprint,
+                'status': response['status'],
+                'headers': response['headers'],
+                'body': b''.join(response['body']),
+            })
@@ -0,0 +1,133 @@
+# app/backend/jobs.py
+import abc
+import asyncio
+import inspect
+import logging
+import os
+
+from app.backend.metrics import JOBS_TOTAL
+
+logger = logging.getLogger(__name__)
+
+# Фоновые задачи после коммита: ограниченная очередь и пул обработчиков в процессе воркера
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+JOB_QUEUE_SIZE = int(os.getenv('JOB_QUEUE_SIZE', '1000'))
+JOB_DRAIN_TIMEOUT = float(os.getenv('JOB_DRAIN_TIMEOUT', '5'))
+
+
+class QueueFull(Exception):
+    pass
+
+
+# Интерфейс очереди: локальная в памяти или внешняя (Redis и т.п.) с тем же набором методов
+class QueueBackend(abc.ABC):
+    @abc.abstractmethod
+    def put_nowait(self, job):
+        ...
+
+    @abc.abstractmethod
+    async def get(self):
+        ...
+
+    @abc.abstractmethod
+    def task_done(self):
+        ...
+
+    @abc.abstractmethod
+    async def join(self):
+        ...
+
+    @abc.abstractmethod
+    def qsize(self):
+        ...
+
+
+class LocalQueue(QueueBackend):
+    def __init__(self, maxsize=JOB_QUEUE_SIZE):
+        self._queue = asyncio.Queue(maxsize)
+
+    def put_nowait(self, job):
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull as e:
+            raise QueueFull from e
+
+    async def get(self):
+        return await self._queue.get()
+
+    def task_done(self):
+        self._queue.task_done()
+
+    async def join(self):
+        await self._queue.join()
+
+    def qsize(self):
+        return self._queue.qsize()
+
+
+# Задача - (имя, функция, аргументы). Корутины выполняются в цикле событий,
+# обычные функции - в потоке, чтобы не блокировать обработку запросов.
+# Переполненная очередь не замедляет запрос: задача отбрасывается и учитывается в метриках.
+class JobPool:
+    def __init__(self, backend=None, workers=JOB_WORKERS):
+        self.backend = backend
+        self.workers = workers
+        self._tasks = []
+
+    @property
+    def running(self):
+        return bool(self._tasks)
+
+    def start(self):
+        if self.running:
+            return
+        if self.backend is None:
+            self.backend = LocalQueue()
+        self._tasks = [asyncio.create_task(self._worker(), name=f'job-worker-{i}') for i in range(self.workers)]
+
+    async def stop(self, timeout=JOB_DRAIN_TIMEOUT):
+        if not self.running:
+            return
+        # Даем дообработать очередь, затем останавливаем обработчики
+        try:
+            await asyncio.wait_for(self.backend.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning('%d background jobs were not finished before shutdown', self.backend.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, name, fn, *args):
+        # Без lifespan (отдельные приложения, тесты) пул запускается при первой задаче
+        self.start()
+        try:
+            self.backend.put_nowait((name, fn, args))
+        except QueueFull:
+            JOBS_TOTAL.inc(name, 'dropped')
+            logger.warning('Background job queue is full, dropping %s', name)
+            return False
+        return True
+
+    async def _worker(self):
+        while True:
+            name, fn, args = await self.backend.get()
+            try:
+                if inspect.iscoroutinefunction(fn):
+                    await fn(*args)
+                else:
+                    await asyncio.to_thread(fn, *args)
+                JOBS_TOTAL.inc(name, 'done')
+            except Exception:
+                JOBS_TOTAL.inc(name, 'failed')
+                logger.exception('Background job %s failed', name)
+            finally:
+                self.backend.task_done()
+
+
+jobs = JobPool()
+
+
+# Некритичная работа после коммита: выполняется в фоне, ошибки только логируются
+def after_commit(name, fn, *args):
+    return jobs.submit(name, fn, *args)
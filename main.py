@@ -1,12 +1,79 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from app.routers.task import router as task_router
-from app.routers.user import router as user_router
+from fastapi.responses import PlainTextResponse, JSONResponse, ORJSONResponse
+from app.backend.cache import user_cache
+from app.models.registry import resolve_all
+from app.backend.db import engine, async_engine, replica_engines
+from app.backend.metrics import MetricsMiddleware, instrument_engine, render_metrics, profiler
+from app.backend.nplusone import DEBUG_LAZY_LOADS, LazyLoadGuardMiddleware
+from app.backend.serialization import FAST_JSON
+from app.backend.idempotency import IdempotencyMiddleware
+from app.backend.jobs import jobs
+from app.backend.write_lock import WRITE_LOCK, WriteLockMiddleware, write_lock_path
+from app.backend.group_commit import GROUP_COMMIT, GROUP_COMMIT_ROUTES, group_commit
+from app.backend.replicas import READ_YOUR_WRITES, ReadYourWritesMiddleware
+from app.backend.startup import LAZY_ROUTERS, LazyRoutersMiddleware, include_routers
+
+# Роутеры по префиксам: при LAZY_ROUTERS=1 импортируются при первом запросе к префиксу
+ROUTER_PATHS = {
+    '/tasks': 'app.routers.task:router',
+    '/users': 'app.routers.user:router',
+}
+
+
+# Самопроверка при старте: воркер не поднимется, если модель не разрешается
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    resolve_all()
+    if profiler is not None:
+        profiler.start()
+    jobs.start()
+    yield
+    # Дообрабатываем фоновые задачи до остановки воркера
+    await jobs.stop()
+    if profiler is not None:
+        profiler.stop()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse if FAST_JSON else JSONResponse)
+# Несколько воркеров на одной SQLite: записи по очереди через межпроцессную блокировку.
+# Самый внутренний слой: повторы по Idempotency-Key блокировку не ждут, а /metrics видит ожидание.
+# Блокировка общая с групповым коммитом: flock через разные дескрипторы конфликтует и внутри процесса
+if WRITE_LOCK and write_lock_path() is not None:
+    app.add_middleware(WriteLockMiddleware, lock=group_commit.write_lock,
+                       exclude=GROUP_COMMIT_ROUTES if GROUP_COMMIT else ())
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(MetricsMiddleware)
 
-app = FastAPI()
+# Отладка N+1: предупреждение или ошибка, если запрос делает слишком много ленивых загрузок
+if DEBUG_LAZY_LOADS:
+    app.add_middleware(LazyLoadGuardMiddleware)
+
+# Время каждого SQL-запроса для /metrics
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+for replica in replica_engines:
+    instrument_engine(replica.sync_engine)
+
+# Чтение с реплик: после записи клиент получает cookie и какое-то время читает из основной базы
+if replica_engines and READ_YOUR_WRITES:
+    app.add_middleware(ReadYourWritesMiddleware)
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to Taskmanager"}
 
-app.include_router(task_router)
-app.include_router(user_router)
+# Счетчики попаданий и промахов кэша пользователей
+@app.get("/cache/stats")
+async def cache_stats():
+    return {"users": user_cache.stats()}
+
+# Метрики в текстовом формате Prometheus
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+if LAZY_ROUTERS:
+    app.add_middleware(LazyRoutersMiddleware, fastapi_app=app, router_paths=ROUTER_PATHS)
+else:
+    include_routers(app, ROUTER_PATHS)
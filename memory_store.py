@@ -0,0 +1,89 @@
+# Индексированное хранилище пользователей в памяти для учебных приложений module_16_*
+from itertools import islice
+from typing import Dict, List, Optional
+
+from app.backend.id_allocator import make_allocator
+
+
+# Запись пользователя: __slots__ экономит память на миллионах записей
+class UserRecord:
+    __slots__ = ('id', 'username', 'age')
+
+    def __init__(self, id: int, username: str, age: int):
+        self.id = id
+        self.username = username
+        self.age = age
+
+    def as_dict(self) -> dict:
+        return {'id': self.id, 'username': self.username, 'age': self.age}
+
+    def __repr__(self) -> str:
+        return f'UserRecord(id={self.id}, username={self.username!r}, age={self.age})'
+
+
+# Все операции по id и username - O(1): словарь по id и вторичный индекс по username.
+# id выдает общий аллокатор и не переиспользует их после удаления.
+class UserStore:
+    def __init__(self, allocator=None):
+        self._by_id: Dict[int, UserRecord] = {}
+        self._by_username: Dict[str, Dict[int, UserRecord]] = {}
+        self._allocator = allocator or make_allocator()
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def allocate_id(self) -> int:
+        return self._allocator.next_id()
+
+    def all(self) -> List[UserRecord]:
+        return list(self._by_id.values())
+
+    # Срез без копирования всего словаря
+    def page(self, offset: int, limit: int) -> List[UserRecord]:
+        return list(islice(self._by_id.values(), offset, offset + limit))
+
+    def get(self, user_id: int) -> Optional[UserRecord]:
+        return self._by_id.get(user_id)
+
+    def get_by_username(self, username: str) -> List[UserRecord]:
+        return list(self._by_username.get(username, {}).values())
+
+    def create(self, username: str, age: int) -> UserRecord:
+        user = UserRecord(self.allocate_id(), username, age)
+        self._by_id[user.id] = user
+        self._index(user)
+        return user
+
+    def update(self, user_id: int, username: str, age: int) -> Optional[UserRecord]:
+        user = self._by_id.get(user_id)
+        if user is None:
+            return None
+        if user.username != username:
+            self._unindex(user)
+            user.username = username
+            self._index(user)
+        user.age = age
+        return user
+
+    def delete(self, user_id: int) -> Optional[UserRecord]:
+        user = self._by_id.pop(user_id, None)
+        if user is not None:
+            self._unindex(user)
+        return user
+
+    def clear(self) -> None:
+        self._by_id.clear()
+        self._by_username.clear()
+
+    def _index(self, user: UserRecord) -> None:
+        self._by_username.setdefault(user.username, {})[user.id] = user
+
+    def _unindex(self, user: UserRecord) -> None:
+        same_name = self._by_username.get(user.username)
+        if same_name is not None:
+            same_name.pop(user.id, None)
+            if not same_name:
+                del self._by_username[user.username]
@@ -0,0 +1,222 @@
+# app/backend/metrics.py
+import collections
+import os
+import re
+import sys
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Профилировщик медленных запросов: 0 - выключен
+PROFILE_SLOW_REQUESTS_MS = float(os.getenv('PROFILE_SLOW_REQUESTS_MS', '0'))
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '5'))
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+
+_lock = threading.Lock()
+
+# Счетчики SQL текущего запроса (заполняются событиями движка)
+_request_sql = ContextVar('request_sql', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._series = {}
+
+    def inc(self, *label_values, amount=1):
+        with _lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for label_values, value in sorted(self._series.items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets, labels=()):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        # labels -> [счетчики по корзинам..., сумма, количество]
+        self._series = {}
+
+    def observe(self, value, *label_values):
+        with _lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for label_values, series in sorted(self._series.items()):
+            for bound, count in zip(self.buckets, series):
+                labels = _format_labels(self.labels, label_values, [('le', bound)])
+                lines.append(f'{self.name}_bucket{labels} {count}')
+            labels = _format_labels(self.labels, label_values, [('le', '+Inf')])
+            lines.append(f'{self.name}_bucket{labels} {series[-1]}')
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{labels} {series[-2]}')
+            lines.append(f'{self.name}_count{labels} {series[-1]}')
+        return lines
+
+
+REQUESTS_TOTAL = Counter('http_requests_total', 'HTTP requests by route and status',
+                         ('method', 'route', 'status'))
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'HTTP request latency',
+                            LATENCY_BUCKETS, ('method', 'route'))
+REQUEST_SQL_STATEMENTS = Histogram('db_statements_per_request', 'SQL statements executed per request',
+                                   COUNT_BUCKETS, ('method', 'route'))
+REQUEST_SQL_SECONDS = Histogram('db_time_per_request_seconds', 'Time spent in SQL per request',
+                                LATENCY_BUCKETS, ('method', 'route'))
+SQL_STATEMENT_SECONDS = Histogram('db_statement_duration_seconds', 'SQL statement latency by operation',
+                                  LATENCY_BUCKETS, ('operation',))
+JOBS_TOTAL = Counter('background_jobs_total', 'Background jobs by name and result', ('job', 'result'))
+
+METRICS = [REQUESTS_TOTAL, REQUEST_LATENCY, REQUEST_SQL_STATEMENTS, REQUEST_SQL_SECONDS, SQL_STATEMENT_SECONDS,
+           JOBS_TOTAL]
+
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# Подписка на события курсора: длительность каждого SQL-запроса
+def instrument_engine(engine):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'UNKNOWN'
+        SQL_STATEMENT_SECONDS.observe(elapsed, operation)
+        stats = _request_sql.get()
+        if stats is not None:
+            stats['statements'] += 1
+            stats['seconds'] += elapsed
+
+
+# Семплирующий профилировщик: фоновый поток снимает стек потока event loop,
+# для запросов дольше порога сохраняет стеки за время запроса в формате folded
+# (flamegraph.pl, speedscope). В стеки попадают и параллельные запросы того же воркера.
+class SamplingProfiler:
+    def __init__(self, threshold_ms, interval_ms=5.0, directory='profiles', window=60.0):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.directory = directory
+        self.window = window
+        self.thread_id = None
+        self._samples = collections.deque()
+        self._samples_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def start(self):
+        # Вызывается из потока event loop: его стек и семплируем
+        self.thread_id = threading.get_ident()
+        os.makedirs(self.directory, exist_ok=True)
+        threading.Thread(target=self._run, name='sampling-profiler', daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            now = time.perf_counter()
+            stack = self._fold(frame)
+            with self._samples_lock:
+                self._samples.append((now, stack))
+                while self._samples and self._samples[0][0] < now - self.window:
+                    self._samples.popleft()
+
+    @staticmethod
+    def _fold(frame):
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(frames))
+
+    def request_finished(self, method, route, started, elapsed):
+        if elapsed < self.threshold:
+            return
+        with self._samples_lock:
+            stacks = collections.Counter(stack for timestamp, stack in self._samples if timestamp >= started)
+        if not stacks:
+            return
+        name = re.sub(r'[^A-Za-z0-9_.-]+', '_', f'{method}_{route}').strip('_')
+        path = os.path.join(self.directory, f'{int(time.time() * 1000)}_{name}_{int(elapsed * 1000)}ms.folded')
+        with open(path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+profiler = SamplingProfiler(PROFILE_SLOW_REQUESTS_MS, PROFILE_INTERVAL_MS, PROFILE_DIR) \
+    if PROFILE_SLOW_REQUESTS_MS > 0 else None
+
+
+# ASGI-middleware: латентность по шаблону маршрута, число и время SQL-запросов за запрос
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = {'statements': 0, 'seconds': 0.0}
+        token = _request_sql.set(stats)
+        response_status = [500]
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                response_status[0] = message['status']
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_sql.reset(token)
+            # Шаблон пути вместо фактического URL, чтобы не плодить серии
+            route = getattr(scope.get('route'), 'path', None) or 'unmatched'
+            method = scope['method']
+            REQUESTS_TOTAL.inc(method, route, response_status[0])
+            REQUEST_LATENCY.observe(elapsed, method, route)
+            REQUEST_SQL_STATEMENTS.observe(stats['statements'], method, route)
+            REQUEST_SQL_SECONDS.observe(stats['seconds'], method, route)
+            if profiler is not None:
+                profiler.request_finished(method, route, started, elapsed)
@@ -1,6 +1,7 @@
 from fastapi import FastAPI, Path, HTTPException
 from pydantic import BaseModel, Field
 from typing import Dict
+from app.backend.id_allocator import make_allocator
 
 app = FastAPI()
 
@@ -12,6 +13,9 @@ class UserModel(BaseModel):
 # Начальный словарь пользователей
 users_db: Dict[str, str] = {'1': 'Имя: Example, возраст: 18'}
 
+# id не повторяются после удаления: счетчик продолжает с последнего выданного
+user_ids = make_allocator(start=len(users_db) + 1)
+
 @app.get('/users')  
 async def get_users():
     return users_db
@@ -26,7 +30,7 @@ async def create_new_user(
     user_model = UserModel(username=username, age=age)
 
     # Создаем ID для нового пользователя
-    user_id = str(len(users_db) + 1)
+    user_id = str(user_ids.next_id())
     users_db[user_id] = f'Имя: {username}, возраст: {age}'
     return f'User {user_id} is registered'
 
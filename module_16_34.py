@@ -1,6 +1,7 @@
 from fastapi import FastAPI, Path
 from pydantic import BaseModel
 from typing import Annotated
+from app.backend.id_allocator import make_allocator
 
 app = FastAPI()
 
@@ -14,6 +15,9 @@ class UserModel(BaseModel):
 # Начальный словарь пользователей
 users = {'1': 'Имя: Example, возраст: 18'}
 
+# Общий аллокатор id для обоих POST-запросов
+user_ids = make_allocator(start=len(users) + 1)
+
 @app.get('/users')
 def get_users():
     return users
@@ -27,8 +31,8 @@ def create_second_user(
     # Валидация через Pydantic
     UserModel(username=username, age=age)
 
-    # Создаем ID для второго пользователя
-    user_id = '2'
+    # Создаем ID для нового пользователя
+    user_id = str(user_ids.next_id())
 
     # Добавляем пользователя
     users[user_id] = f'Имя: {username}, возраст: {age}'
@@ -46,8 +50,8 @@ def create_third_user(
     # Валидация через Pydantic
     UserModel(username=username, age=age)
 
-    # Создаем ID для третьего пользователя
-    user_id = '3'
+    # Создаем ID для нового пользователя
+    user_id = str(user_ids.next_id())
 
     # Добавляем пользователя
     users[user_id] = f'Имя: {username}, возраст: {age}'
@@ -1,10 +1,12 @@
 from fastapi import FastAPI, status, Body, HTTPException
 from pydantic import BaseModel
 from typing import List
+from memory_store import UserStore
 
 app = FastAPI()
 
-users_db = []
+# Хранилище с индексом по id: поиск, обновление и удаление за O(1)
+users_db = UserStore()
 
 class User(BaseModel):
     id: int
@@ -14,20 +16,18 @@ class User(BaseModel):
 
 @app.get("/")
 async def get_all_users() -> List[User]:
-    return users_db
+    return users_db.all()
 
 @app.get(path="/user/{user_id}")
 async def get_user(user_id: int) -> User:
-    try:
-        return users_db[user_id]
-    except IndexError:
+    user = users_db.get(user_id)
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 @app.post("/user/{username}/{age}", response_model=User)
 async def create_new_user(username: str, age: int) -> User:
-    user_id = len(users_db) + 1
-    new_user = User(id=user_id, username=username, age=age)
-    users_db.append(new_user)
+    new_user = users_db.create(username, age)
 
     print("Создан пользователь:", new_user)
     return new_user
@@ -35,31 +35,22 @@ async def create_new_user(username: str, age: int) -> User:
 
 @app.put("/user/{user_id}/{username}/{age}", response_model=User)
 async def update_user(user_id: int, username: str, age: int) -> User:
-    try:
-        # Находим индекс пользователя с заданным id
-        user_index = next(index for index, user in enumerate(users_db) if user.id == user_id)
-
-        # Обновляем пользователя
-        users_db[user_index].username = username
-        users_db[user_index].age = age
-
-        # Возвращаем обновленного пользователя
-        return users_db[user_index]
-    except StopIteration:
+    # Обновляем пользователя по id
+    user = users_db.update(user_id, username, age)
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
+    # Возвращаем обновленного пользователя
+    return user
+
 
 @app.delete("/user/{user_id}", response_model=User)
 async def delete_user(user_id: int) -> User:
-    try:
-        # Находим индекс пользователя с заданным id
-        user_index = next(index for index, user in enumerate(users_db) if user.id == user_id)
-
-        # Удаляем пользователя по найденному индексу
-        deleted_user = users_db.pop(user_index)
-        return deleted_user  # Возвращаем удаленного пользователя
-    except StopIteration:
+    # Удаляем пользователя по id
+    deleted_user = users_db.delete(user_id)
+    if deleted_user is None:
         raise HTTPException(status_code=404, detail="User not found")
+    return deleted_user  # Возвращаем удаленного пользователя
 
 
 @app.delete("/")
@@ -1,13 +1,29 @@
-from fastapi import FastAPI, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse
+import os
+import secrets
+import tempfile
+from collections import OrderedDict
+from fastapi import FastAPI, Request, Form, HTTPException, Query, Response
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
 from pydantic import BaseModel
 from pathlib import Path
+from memory_store import UserStore
 
 app = FastAPI()
 BASE_DIR = Path(__file__).parent
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
+# Скомпилированные шаблоны сохраняются на диск: новые воркеры не разбирают users.html и main.html заново
+TEMPLATE_CACHE_DIR = os.getenv('TEMPLATE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'module_16_5_templates'))
+os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+templates.env.bytecode_cache = FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Сколько отрендеренных страниц держать в памяти (page и size задает клиент)
+PAGE_CACHE_SIZE = int(os.getenv('PAGE_CACHE_SIZE', '256'))
+
 
 # Модель пользователя
 class User(BaseModel):
@@ -22,62 +38,121 @@ class UserUpdate(BaseModel):
     age: int
 
 
-# База данных в памяти
-users_db = []
-current_id = 1
+# База данных в памяти с индексом по id
+users_db = UserStore()
+
+
+# Кэш отрендеренных страниц списка. Версия увеличивается при любом изменении
+# пользователей и входит в ETag, поэтому ETag известен до рендеринга.
+class RenderedPageCache:
+    def __init__(self, maxsize=PAGE_CACHE_SIZE):
+        self.version = 0
+        # Версия начинается с 0 в каждом процессе: случайный токен не дает одинаковым ETag
+        # после перезапуска или на другом воркере соответствовать другому содержимому
+        self.boot = secrets.token_hex(8)
+        self.maxsize = maxsize
+        self._pages = OrderedDict()
+
+    def etag(self, page, size):
+        return f'"users-{self.boot}-v{self.version}-p{page}-s{size}"'
+
+    def get(self, page, size):
+        html = self._pages.get((page, size))
+        if html is not None:
+            self._pages.move_to_end((page, size))
+        return html
+
+    def invalidate(self):
+        self.version += 1
+        self._pages.clear()
+
+    # Отдаем куски по мере рендеринга и сохраняем страницу, если за это время данные не менялись
+    def capture(self, page, size, chunks):
+        version = self.version
+        rendered = []
+        for chunk in chunks:
+            rendered.append(chunk)
+            yield chunk
+        if version == self.version:
+            self._pages[(page, size)] = ''.join(rendered)
+            while len(self._pages) > self.maxsize:
+                self._pages.popitem(last=False)
+
+
+users_pages = RenderedPageCache()
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    return any(tag.strip() in (etag, '*') for tag in header.split(','))
 
 
-# Маршрут для главной страницы со списком пользователей
+# Маршрут для главной страницы со списком пользователей (постранично, с ETag)
 @app.get("/", response_class=HTMLResponse)
-async def get_users(request: Request):
-    return templates.TemplateResponse(
-        "users.html",
-        {"request": request, "users": users_db}
-    )
+async def get_users(request: Request, page: int = Query(1, ge=1), size: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    etag = users_pages.etag(page, size)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={'ETag': etag})
+
+    html = users_pages.get(page, size)
+    if html is not None:
+        return HTMLResponse(html, headers={'ETag': etag})
+
+    context = {
+        "request": request,
+        "users": users_db.page((page - 1) * size, size),
+        "page": page,
+        "size": size,
+        "prev_page": page - 1 if page > 1 else None,
+        "next_page": page + 1 if page * size < len(users_db) else None,
+    }
+    # generate() отдает HTML частями вместо одной большой строки
+    chunks = templates.get_template("users.html").generate(context)
+    # Пустые страницы за концом списка не кэшируем: их число ничем не ограничено
+    if context["users"] or page == 1:
+        chunks = users_pages.capture(page, size, chunks)
+    return StreamingResponse(chunks, media_type="text/html", headers={'ETag': etag})
 
 
 # Маршрут для получения конкретного пользователя
 @app.get("/user/{user_id}", response_class=HTMLResponse)
 async def get_user(request: Request, user_id: int):
-    user = next((user for user in users_db if user.id == user_id), None)
+    user = users_db.get(user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="Пользователь не найден")
     return templates.TemplateResponse(
         "users.html",
-        {"request": request, "user": User}
+        {"request": request, "user": user}
     )
 
 
 # Маршрут для создания нового пользователя
 @app.post("/user", response_class=HTMLResponse)
 async def create_user(request: Request, username: str = Form(...), age: int = Form(...)):
-    global current_id
-    new_user = User(id=current_id, username=username, age=age)
-    users_db.append(new_user)
-    current_id += 1
-    return templates.TemplateResponse(
-        "users.html",
-        {"request": request, "users": users_db}
-    )
+    users_db.create(username, age)
+    users_pages.invalidate()
+    # Список отдает кэшируемая главная страница (Post/Redirect/Get)
+    return RedirectResponse(url="/", status_code=303)
 
 
 # Маршрут для обновления пользователя
 @app.put("/user/{user_id}")
 async def update_user(user_id: int, user_update: UserUpdate):
-    user = next((user for user in users_db if user.id == user_id), None)
+    # Обновляем данные пользователя
+    user = users_db.update(user_id, user_update.username, user_update.age)
     if user is None:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
+    users_pages.invalidate()
 
-    # Обновляем данные пользователя
-    user.username = user_update.username
-    user.age = user_update.age
-
-    return {"message": "Данные пользователя обновлены", "user": user}
+    return {"message": "Данные пользователя обновлены", "user": user.as_dict()}
 
 
 # Маршрут для удаления пользователя
 @app.delete("/user/{user_id}")
 async def delete_user(user_id: int):
-    user = next((user for user in users_db if user.id == user_id), None)
-    if user is None:
+    if users_db.delete(user_id) is None:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
-    users_db.remove(user)
+    users_pages.invalidate()
     return {"message": "Пользователь успешно удален"}
@@ -0,0 +1,77 @@
+# app/backend/nplusone.py
+import collections
+import logging
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Отладочный режим: считаем ленивые загрузки связей за запрос
+DEBUG_LAZY_LOADS = os.getenv('DEBUG_LAZY_LOADS', '0') == '1'
+LAZY_LOAD_LIMIT = int(os.getenv('LAZY_LOAD_LIMIT', '10'))
+LAZY_LOAD_ACTION = os.getenv('LAZY_LOAD_ACTION', 'log')  # 'log' или 'raise'
+
+_lazy_loads = ContextVar('lazy_loads', default=None)
+_installed = False
+
+
+class TooManyLazyLoads(RuntimeError):
+    pass
+
+
+def _on_orm_execute(orm_execute_state):
+    # lazy_loaded_from заполнен только для ленивой загрузки (selectinload/joinedload сюда не попадают)
+    state = orm_execute_state.lazy_loaded_from
+    if state is None:
+        return
+    guard = _lazy_loads.get()
+    if guard is None:
+        return
+    guard['count'] += 1
+    guard['sources'][state.class_.__name__] += 1
+    if guard['count'] > guard['limit']:
+        message = (f"{guard['count']} lazy loads in one request (limit {guard['limit']}): "
+                   f"{dict(guard['sources'])}. Use selectinload() for the relationship.")
+        if guard['action'] == 'raise':
+            raise TooManyLazyLoads(message)
+        if guard['count'] == guard['limit'] + 1:
+            logger.warning(message)
+
+
+# Подписка на выполнение ORM-запросов всех сессий (AsyncSession работает через Session)
+def install():
+    global _installed
+    if not _installed:
+        event.listen(Session, 'do_orm_execute', _on_orm_execute)
+        _installed = True
+
+
+# Для тестов: with lazy_load_guard(limit=1): ... упадет на N+1
+@contextmanager
+def lazy_load_guard(limit=LAZY_LOAD_LIMIT, action='raise'):
+    install()
+    guard = {'count': 0, 'limit': limit, 'action': action, 'sources': collections.Counter()}
+    token = _lazy_loads.set(guard)
+    try:
+        yield guard
+    finally:
+        _lazy_loads.reset(token)
+
+
+class LazyLoadGuardMiddleware:
+    def __init__(self, app, limit=LAZY_LOAD_LIMIT, action=LAZY_LOAD_ACTION):
+        self.app = app
+        self.limit = limit
+        self.action = action
+        install()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        with lazy_load_guard(self.limit, self.action):
+            await self.app(scope, receive, send)
@@ -0,0 +1,60 @@
+# app/backend/pagination.py
+import base64
+import json
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+
+# Курсор - непрозрачная для клиента строка с ключом последней строки страницы
+def encode_cursor(*values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+# Курсор-смещение для выдачи, где keyset неприменим (сортировка по релевантности)
+def decode_offset(cursor):
+    if cursor is None:
+        return 0
+    offset = decode_cursor(cursor, 1)[0]
+    if not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return offset
+
+
+# (a, b) > (x, y)  ->  a > x OR (a = x AND b > y)
+def keyset_where(columns, values):
+    clause = columns[-1] > values[-1]
+    for column, value in zip(reversed(columns[:-1]), reversed(values[:-1])):
+        clause = or_(column > value, and_(column == value, clause))
+    return clause
+
+
+# Запрашиваем на одну строку больше, чтобы понять, есть ли следующая страница
+def paginate(stmt, columns, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    if cursor is not None:
+        stmt = stmt.where(keyset_where(columns, decode_cursor(cursor, len(columns))))
+    return stmt.order_by(*columns).limit(limit + 1)
+
+
+def make_page(rows, columns, limit):
+    items = list(rows[:limit])
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(*(getattr(last, column.key) for column in columns))
+    return {'items': items, 'next_cursor': next_cursor}
@@ -0,0 +1,46 @@
+# app/models/registry.py
+import importlib
+
+from app.backend.db import Base
+
+# Реестр моделей: имя -> "модуль:класс". Общий для роутеров и alembic env.py
+MODEL_PATHS = {
+    'User': 'app.models.user:User',
+    'Task': 'app.models.task:Task',
+}
+
+_resolved = {}
+
+
+class ModelResolutionError(RuntimeError):
+    pass
+
+
+# Импорт выполняется один раз, дальше модель берется из словаря
+def resolve_model(name):
+    model = _resolved.get(name)
+    if model is None:
+        try:
+            module_path, class_name = MODEL_PATHS[name].split(':')
+            model = getattr(importlib.import_module(module_path), class_name)
+        except (KeyError, ImportError, AttributeError) as e:
+            raise ModelResolutionError(f"Cannot resolve model '{name}': {e}") from e
+        _resolved[name] = model
+    return model
+
+
+# Проверка при старте: все модели импортируются и их таблицы есть в Base.metadata
+def resolve_all():
+    errors = []
+    models = {}
+    for name in MODEL_PATHS:
+        try:
+            models[name] = resolve_model(name)
+        except ModelResolutionError as e:
+            errors.append(str(e))
+            continue
+        if models[name].__table__.name not in Base.metadata.tables:
+            errors.append(f"Model '{name}' is not mapped on Base.metadata")
+    if errors:
+        raise ModelResolutionError('; '.join(errors))
+    return models
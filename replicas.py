@@ -0,0 +1,42 @@
+# app/backend/replicas.py
+import os
+import time
+
+from app.backend.write_lock import WRITE_METHODS
+
+# Read-your-writes: после успешной записи клиент READ_YOUR_WRITES_SECONDS читает из основной базы,
+# пока реплики догоняют. Клиентская сессия - cookie, которую ставит ReadYourWritesMiddleware
+READ_YOUR_WRITES = os.getenv('READ_YOUR_WRITES', '1') == '1'
+READ_YOUR_WRITES_SECONDS = float(os.getenv('READ_YOUR_WRITES_SECONDS', '5'))
+LAST_WRITE_COOKIE = 'last_write'
+
+
+def read_from_primary(request):
+    if not READ_YOUR_WRITES:
+        return False
+    try:
+        last_write = float(request.cookies.get(LAST_WRITE_COOKIE, ''))
+    except ValueError:
+        return False
+    return time.time() - last_write < READ_YOUR_WRITES_SECONDS
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app, methods=WRITE_METHODS, seconds=READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.methods = methods
+        self.seconds = seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] not in self.methods:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message['type'] == 'http.response.start' and message['status'] < 400:
+                cookie = (f'{LAST_WRITE_COOKIE}={time.time():.3f}; Max-Age={int(self.seconds) or 1}; '
+                          f'Path=/; HttpOnly; SameSite=Lax')
+                message = {**message, 'headers': [*message.get('headers', []), (b'set-cookie', cookie.encode())]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 class UserBase(BaseModel):
@@ -49,6 +49,12 @@ class CreateTask(BaseModel):
         from_attributes = True
 
 
+# Новая задача: CreateTask используется и для PUT, поэтому владелец и статус - только здесь
+class CreateTaskForUser(CreateTask):
+    user_id: int
+    completed: bool = False
+
+
 class UpdateTask(BaseModel):
     title: Optional[str] = None
     content: Optional[str] = None
@@ -56,3 +62,65 @@ class UpdateTask(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class TaskResponse(BaseModel):
+    id: int
+    title: str
+    content: str
+    priority: int
+    completed: bool
+    user_id: int
+    slug: str
+
+    class Config:
+        from_attributes = True
+
+
+class UserWithTasks(UserResponse):
+    tasks: Optional[List[TaskResponse]] = None
+
+
+# Страницы для курсорной пагинации
+class UserPage(BaseModel):
+    items: List[UserResponse]
+    next_cursor: Optional[str] = None
+
+
+class UserWithTasksPage(BaseModel):
+    items: List[UserWithTasks]
+    next_cursor: Optional[str] = None
+
+
+class TaskPage(BaseModel):
+    items: List[TaskResponse]
+    next_cursor: Optional[str] = None
+
+
+# Массовые операции
+class BulkUpdateUser(UpdateUser):
+    id: int
+
+
+class BulkCreateTask(CreateTaskForUser):
+    pass
+
+
+class BulkUpdateTask(UpdateTask):
+    id: int
+    completed: Optional[bool] = None
+
+
+class BulkDelete(BaseModel):
+    ids: List[int]
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: str
+    detail: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    results: List[BulkItemResult]
@@ -0,0 +1,39 @@
+# app/backend/search.py
+from sqlalchemy import select, func, literal_column, table, column
+
+# Виртуальная таблица FTS5 (создается миграцией f58adf6e1395, синхронизируется триггерами)
+tasks_fts = table('tasks_fts', column('rowid'), column('rank'))
+
+# Выражение должно совпадать с GIN-индексом ix_tasks_fts в PostgreSQL
+TASKS_TSVECTOR = "to_tsvector('simple', coalesce(tasks.title, '') || ' ' || coalesce(tasks.content, ''))"
+
+
+# Пользовательский ввод превращаем в набор слов в кавычках: операторы FTS5 не интерпретируются
+def fts5_query(terms):
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in terms.split())
+
+
+def _sqlite_search(model, terms):
+    return (
+        select(model)
+        .join(tasks_fts, tasks_fts.c.rowid == model.id)
+        .where(literal_column('tasks_fts').op('MATCH')(fts5_query(terms)))
+        .order_by(tasks_fts.c.rank, model.id)
+    )
+
+
+def _postgres_search(model, terms):
+    document = literal_column(TASKS_TSVECTOR)
+    query = func.plainto_tsquery(literal_column("'simple'"), terms)
+    return (
+        select(model)
+        .where(document.op('@@')(query))
+        .order_by(func.ts_rank(document, query).desc(), model.id)
+    )
+
+
+# Запрос полнотекстового поиска по задачам, упорядоченный по релевантности
+def search_tasks_stmt(dialect_name, model, terms):
+    if dialect_name == 'postgresql':
+        return _postgres_search(model, terms)
+    return _sqlite_search(model, terms)
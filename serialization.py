@@ -0,0 +1,27 @@
+# app/backend/serialization.py
+import os
+
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+
+# Быстрый режим: строки из БД отдаются через orjson как есть, без построения
+# pydantic-моделей и повторной валидации по response_model
+FAST_JSON = os.getenv('FAST_JSON', '0') == '1'
+
+
+# Выборка колонок вместо ORM-объектов: без identity map и загрузки атрибутов.
+# Выбираются только поля схемы ответа: колонки вне схемы наружу не уходят
+def select_columns(model, schema):
+    return select(*(model.__table__.c[name] for name in schema.model_fields))
+
+
+def row_response(row, schema, status_code=200):
+    return ORJSONResponse({name: row[name] for name in schema.model_fields}, status_code=status_code)
+
+
+# Страница из make_page, построенная по строкам select_columns()
+def page_response(page):
+    return ORJSONResponse({
+        'items': [row._asdict() for row in page['items']],
+        'next_cursor': page['next_cursor'],
+    })
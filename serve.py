@@ -0,0 +1,101 @@
+# app/serve.py
+# Запуск в продакшене: N процессов-воркеров на общем сокете, по умолчанию по числу ядер.
+#
+#   python -m app.serve --workers 8 --port 8000
+#   python -m app.serve --reload          # разработка: один процесс с перезагрузкой
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+APP = 'app.main:app'
+
+
+def default_workers():
+    # Учитываем ограничение по CPU (taskset, cgroups), а не все ядра машины
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# Выполняется в дочернем процессе (spawn): окружение задается до импорта приложения,
+# чтобы аллокаторы id и блокировка записи увидели номер воркера
+def run_worker(config_kwargs, sockets, worker_id, worker_count, write_lock):
+    import uvicorn
+
+    os.environ['WORKER_ID'] = str(worker_id)
+    os.environ['WORKER_COUNT'] = str(worker_count)
+    if write_lock:
+        os.environ['WRITE_LOCK'] = '1'
+    config = uvicorn.Config(APP, **config_kwargs)
+    uvicorn.Server(config).run(sockets=sockets)
+
+
+def spawn(context, config_kwargs, sockets, worker_id, args):
+    process = context.Process(target=run_worker, name=f'worker-{worker_id}',
+                              args=(config_kwargs, sockets, worker_id, args.workers, not args.no_write_lock))
+    process.start()
+    return process
+
+
+# Супервизор: перезапускает упавшие воркеры и останавливает всех по SIGINT/SIGTERM
+def supervise(args):
+    import uvicorn
+
+    config_kwargs = {'log_level': args.log_level, 'proxy_headers': True, 'access_log': args.access_log}
+    sock = uvicorn.Config(APP, host=args.host, port=args.port).bind_socket()
+    context = multiprocessing.get_context('spawn')
+    workers = {i: spawn(context, config_kwargs, [sock], i, args) for i in range(args.workers)}
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while not stopping:
+        for worker_id, process in list(workers.items()):
+            if not process.is_alive() and not stopping:
+                print(f'worker {worker_id} (pid {process.pid}) exited with {process.exitcode}, restarting',
+                      file=sys.stderr)
+                workers[worker_id] = spawn(context, config_kwargs, [sock], worker_id, args)
+        time.sleep(0.5)
+
+    for process in workers.values():
+        process.terminate()
+    for process in workers.values():
+        process.join(args.graceful_timeout)
+        if process.is_alive():
+            process.kill()
+    sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the task manager API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=default_workers())
+    parser.add_argument('--log-level', default='info')
+    parser.add_argument('--access-log', action='store_true')
+    parser.add_argument('--graceful-timeout', type=float, default=30)
+    parser.add_argument('--no-write-lock', action='store_true',
+                        help='do not serialize SQLite writes across workers')
+    parser.add_argument('--reload', action='store_true', help='single process with auto reload (development)')
+    args = parser.parse_args(argv)
+
+    if args.reload:
+        import uvicorn
+
+        uvicorn.run(APP, host=args.host, port=args.port, reload=True, log_level=args.log_level)
+        return
+    supervise(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+# app/backend/slugs.py
+import os
+from functools import lru_cache
+
+from slugify import slugify
+
+SLUG_CACHE_SIZE = int(os.getenv('SLUG_CACHE_SIZE', '4096'))
+
+
+# Транслитерация длинных кириллических строк заметно нагружает CPU, а имена и заголовки
+# часто повторяются (повторы запросов, обновления без смены username) - запоминаем результат.
+# slug пишется в ту же строку под уникальным индексом, поэтому считается до INSERT, а не в фоне.
+@lru_cache(maxsize=SLUG_CACHE_SIZE)
+def make_slug(text):
+    return slugify(text)
@@ -0,0 +1,94 @@
+# app/backend/startup.py
+import importlib
+import json
+import os
+import re
+import subprocess
+import sys
+
+# Ленивое подключение роутеров: модуль импортируется при первом запросе к его префиксу,
+# а не при старте воркера. Проверки здоровья ("/", "/metrics") роутеры не трогают.
+LAZY_ROUTERS = os.getenv('LAZY_ROUTERS', '0') == '1'
+
+
+def import_string(path):
+    module_path, attr = path.split(':')
+    return getattr(importlib.import_module(module_path), attr)
+
+
+def include_routers(app, router_paths):
+    for path in router_paths.values():
+        app.include_router(import_string(path))
+
+
+class LazyRoutersMiddleware:
+    def __init__(self, app, fastapi_app, router_paths):
+        self.app = app
+        self.fastapi_app = fastapi_app
+        self.pending = dict(router_paths)
+        # Схема OpenAPI должна видеть все маршруты
+        self.mount_all_on = {path for path in (fastapi_app.openapi_url, fastapi_app.docs_url,
+                                               fastapi_app.redoc_url) if path}
+
+    def _mount(self, path):
+        # Импорт синхронный, поэтому два запроса в одном цикле событий не смонтируют роутер дважды
+        prefixes = list(self.pending) if path in self.mount_all_on else \
+            [prefix for prefix in self.pending if path == prefix or path.startswith(prefix + '/')]
+        for prefix in prefixes:
+            self.fastapi_app.include_router(import_string(self.pending.pop(prefix)))
+        if prefixes:
+            # Схема могла быть построена до подключения роутера
+            self.fastapi_app.openapi_schema = None
+
+    async def __call__(self, scope, receive, send):
+        if self.pending and scope['type'] == 'http':
+            self._mount(scope['path'])
+        await self.app(scope, receive, send)
+
+
+# Выполняется в отдельном процессе под python -X importtime: время импорта приложения
+# и время до первого ответа (прогон lifespan и GET path через ASGI без сети)
+_PROBE = '''
+import asyncio, json, time, httpx
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def first_request():
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get(%r)
+    return response.status_code
+
+status = asyncio.run(first_request())
+print(json.dumps({"import_ms": (imported - started) * 1000,
+                  "first_request_ms": (time.perf_counter() - started) * 1000, "status": status}))
+'''
+
+_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+
+
+# Отчет о старте: время импорта по модулям (self и cumulative, мкс) и время до первого запроса
+def measure_startup(path='/', lazy=False, top=25, env=None):
+    env = dict(os.environ if env is None else env, LAZY_ROUTERS='1' if lazy else '0')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', _PROBE % path],
+                            capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(f'Startup probe failed:\n{result.stderr[-2000:]}')
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append({'module': name, 'self_us': int(self_us), 'cumulative_us': int(cumulative_us),
+                            'depth': len(indent) // 2})
+
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['lazy_routers'] = lazy
+    report['path'] = path
+    report['app_modules'] = sorted((m for m in modules if m['module'].startswith('app.')),
+                                   key=lambda m: m['cumulative_us'], reverse=True)
+    report['top_modules'] = sorted(modules, key=lambda m: m['self_us'], reverse=True)[:top]
+    return report
@@ -1,24 +1,27 @@
 # app/models/task.py
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Index, DateTime, func, literal_column
 from sqlalchemy.orm import relationship
-from sqlalchemy.schema import CreateTable
-from app.backend.db import Base
+from app.backend.db import Base, ID_TYPE, model_id_default
 from app.models.user import User
 
 class Task(Base):
     __tablename__ = 'tasks'
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # Фильтр по user_id + completed и сортировка по (priority, id) в списке задач
+        Index('ix_tasks_user_id_completed_priority_id', 'user_id', 'completed', 'priority', 'id'),
+        {"extend_existing": True},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(ID_TYPE, primary_key=True, default=model_id_default())
     title = Column(String)
     content = Column(String)
     priority = Column(Integer, default=0)
     completed = Column(Boolean, default=False)
-    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    user_id = Column(ID_TYPE, ForeignKey('users.id', name='fk_tasks_user_id_users', ondelete='CASCADE'),
+                     nullable=False)
     slug = Column(String, unique=True, index=True)
+    # Версия строки для ETag/If-Match и время последнего изменения для Last-Modified
+    version = Column(Integer, nullable=False, default=1, server_default='1', onupdate=literal_column('version') + 1)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
     user = relationship('User', back_populates='tasks')
-
-
-# Для печати SQL-запроса
-print(CreateTable(Task.__table__))
@@ -1,14 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List
-from slugify import slugify
-
-from app.schemas.user_s import TaskResponse, CreateTask
-from app.backend.db_depends import get_db
+from sqlalchemy import insert
+from typing import List, Literal, Optional
+from app.backend.slugs import make_slug
+
+from app.schemas.user_s import TaskResponse, CreateTask, CreateTaskForUser
+from app.backend.db_depends import get_db, get_read_db
+from app.backend.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, make_page, encode_cursor, decode_offset
+from app.backend.search import search_tasks_stmt
+from app.backend.export import export_response
+from app.backend.crud import update_returning
+from app.backend.cache import row_to_dict
+from app.backend.serialization import FAST_JSON, select_columns, page_response, row_response
+from app.backend.conditional import not_modified, set_validators, expected_version
+from app.backend.group_commit import GROUP_COMMIT, group_commit
+from app.backend.bulk import check_bulk_size, bulk_insert, bulk_update, bulk_delete
+from app.models.registry import resolve_model
+from app.schemas import TaskPage, BulkCreateTask, BulkUpdateTask, BulkDelete, BulkResult
 
 router_task = APIRouter(prefix='/tasks', tags=['tasks'])
 
+# Модель разрешается один раз при создании роутера
+Tasks = resolve_model('Task')
+
 # Фейковые данные пользователей
 fake_users = [
     {"id": 1, "username": "user1", "firstname": "john", "lastname": "Guy", "age": 25,
@@ -48,47 +63,93 @@ fake_tasks = [
     }
 ]
 
-@router_task.get("/tasks/", response_model=List[TaskResponse])
-def all_tasks(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    import importlib
-    # Динамический импорт класса Tasks
-    task_module = importlib.import_module('app.models.task_m')  # Импортируем модуль task_m
-    Tasks = task_module.Tasks  # Получаем доступ к классу Tasks
-
-    # Получаем все задачи из базы данных с использованием skip и limit
-    result = db.execute(select(Tasks).offset(skip).limit(limit))
-    tasks = result.scalars().all()  # Получаем все задачи
-
-    return tasks
-
-
-@router_task.get("tasks/{task_id}", response_model=TaskResponse)
-def task_by_id(task_id: int, db: Session = Depends(get_db)):
-    import importlib
-    task_module = importlib.import_module('app.models.task_m')  # Импортируем модуль task_m
-    Tasks = task_module.Tasks  # Получаем доступ к классу Tasks
-
-    result = db.execute(select(Tasks).where(Tasks.id == task_id))
+@router_task.get("/tasks/", response_model=TaskPage)
+async def all_tasks(user_id: Optional[int] = None,
+                    completed: Optional[bool] = None,
+                    cursor: Optional[str] = None,
+                    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                    db: AsyncSession = Depends(get_read_db)):
+    # Фильтры покрываются индексом ix_tasks_user_id_completed_priority_id
+    stmt = select_columns(Tasks, TaskResponse) if FAST_JSON else select(Tasks)
+    if user_id is not None:
+        stmt = stmt.where(Tasks.user_id == user_id)
+    if completed is not None:
+        stmt = stmt.where(Tasks.completed == completed)
+
+    # Получаем страницу задач, упорядоченных по (priority, id), после курсора
+    keys = [Tasks.priority, Tasks.id]
+    result = await db.execute(paginate(stmt, keys, cursor, limit))
+    if FAST_JSON:
+        return page_response(make_page(result.all(), keys, limit))
+
+    tasks = result.scalars().all()
+    return make_page(tasks, keys, limit)
+
+
+# Полнотекстовый поиск по title и content, результаты по релевантности
+@router_task.get("/search", response_model=TaskPage)
+async def search_tasks(q: str = Query(..., min_length=1, max_length=200),
+                       cursor: Optional[str] = None,
+                       limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                       db: AsyncSession = Depends(get_read_db)):
+    # Строка из одних пробелов проходит min_length, но не содержит слов: MATCH '' в FTS5 - ошибка
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=422, detail="Search query is blank")
+    offset = decode_offset(cursor)
+    stmt = search_tasks_stmt(db.bind.dialect.name, Tasks, q).offset(offset).limit(limit + 1)
+    tasks = (await db.scalars(stmt)).all()
+
+    next_cursor = encode_cursor(offset + limit) if len(tasks) > limit else None
+    return {'items': tasks[:limit], 'next_cursor': next_cursor}
+
+
+# Потоковая выгрузка всех задач в NDJSON или CSV
+@router_task.get("/export")
+async def export_tasks(fmt: Literal['ndjson', 'csv'] = Query('ndjson', alias='format')):
+    return export_response(Tasks, fmt)
+
+
+@router_task.get("/tasks/{task_id}", response_model=TaskResponse)
+async def task_by_id(task_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    result = await db.execute(select(Tasks).where(Tasks.id == task_id))
     task = result.scalars().first()
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    return task
+    # Клиент с актуальной версией получает 304 без тела
+    return not_modified(request, response, task) or task
+
+
+# Создание задачи внутри общей транзакции группового коммита: без commit, строка через RETURNING
+async def _insert_task(db, task):
+    existing_task = await db.scalar(select(Tasks.id).where(Tasks.title == task.title))
+    if existing_task:
+        raise HTTPException(status_code=400, detail="Такая существует")
+    stmt = insert(Tasks).values(
+        title=task.title,
+        content=task.content,
+        priority=task.priority,
+        completed=task.completed,
+        user_id=task.user_id,
+        slug=make_slug(task.title)
+    ).returning(*Tasks.__table__.columns)
+    return dict((await db.execute(stmt)).mappings().one())
 
 
 @router_task.post("/tasks/", response_model=TaskResponse)
-def create_task(task: CreateTask, db: Session = Depends(get_db)):
-    import importlib
-    task_module = importlib.import_module('app.models.task_m')  # Импортируем модуль task_m
-    Tasks = task_module.Tasks  # Получаем доступ к классу Tasks
+async def create_task(task: CreateTaskForUser, db: AsyncSession = Depends(get_db)):
+    if GROUP_COMMIT:
+        created_task = await group_commit.submit(lambda group_db: _insert_task(group_db, task))
+        return row_response(created_task, TaskResponse) if FAST_JSON else created_task
 
     # Проверяем, существует ли пользователь с таким name и email
-    existing_task = db.query(Tasks).filter(Tasks.title == task.title).first()
+    existing_task = await db.scalar(select(Tasks).where(Tasks.title == task.title))
     if existing_task:
         raise HTTPException(status_code=400, detail="Такая существует")
 
     # Генерируем slug на основе title
-    task_slug = slugify(task.title)
+    task_slug = make_slug(task.title)
 
     db_task = Tasks(
         title=task.title,
@@ -96,12 +157,15 @@ def create_task(task: CreateTask, db: Session = Depends(get_db)):
         priority=task.priority,
         completed=task.completed,
         user_id=task.user_id,
-        slug=task.slug
+        slug=task_slug
     )
     # Добавляем задачу в базу данных
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    await db.commit()
+    await db.refresh(db_task)
+
+    if FAST_JSON:
+        return row_response(row_to_dict(db_task), TaskResponse)
 
     return TaskResponse(
         id=db_task.id,
@@ -114,34 +178,55 @@ def create_task(task: CreateTask, db: Session = Depends(get_db)):
     )
 
 @router_task.put("/tasks/{task_id}", response_model=TaskResponse)
-def update_task(task_id: int, task: CreateTask, db: Session = Depends(get_db)):
-    import importlib
-    task_module = importlib.import_module('app.models.task_m')  # Импортируем модуль task_m
-    Tasks = task_module.Tasks  # Получаем доступ к классу Tasks
-    result = db.execute(select(Tasks).where(Tasks.id == task_id))
-    db_task = result.scalar_one_or_none()
-
-    if not db_task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
-    for key, value in task.dict(exclude_unset=True).items():
-        setattr(db_task, key, value)
-
-    db.commit()
-    db.refresh(db_task)
-    return db_task
+async def update_task(task_id: int, task: CreateTask, response: Response, db: AsyncSession = Depends(get_db),
+                      if_match: Optional[str] = Header(None)):
+    values = task.model_dump(exclude_unset=True)
+    # If-Match с устаревшей версией -> 412
+    version = expected_version(if_match, task_id)
+    if GROUP_COMMIT:
+        updated_task = await group_commit.submit(
+            lambda group_db: update_returning(group_db, Tasks, task_id, values, "Task not found", version, commit=False))
+    else:
+        updated_task = await update_returning(db, Tasks, task_id, values, "Task not found", version)
+    set_validators(response, updated_task)
+    return updated_task
 
 @router_task.delete("/tasks/{task_id}", response_model=dict)
-def delete_task(task_id: int, db: Session = Depends(get_db)):
-    import importlib
-    task_module = importlib.import_module('app.models.task_m')  # Импортируем модуль task_m
-    Tasks = task_module.Tasks  # Получаем доступ к классу Tasks
-    result = db.execute(select(Tasks).where(Tasks.id == task_id))
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(Tasks).where(Tasks.id == task_id))
     db_task = result.scalar_one_or_none()
 
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    db.delete(db_task)
-    db.commit()
+    await db.delete(db_task)
+    await db.commit()
     return {"detail": "Task deleted successfully"}
+
+
+# Массовое создание задач в одной транзакции
+@router_task.post("/bulk", response_model=BulkResult)
+async def bulk_create_tasks(tasks: List[BulkCreateTask], db: AsyncSession = Depends(get_db)):
+    check_bulk_size(tasks)
+    rows = [dict(task.model_dump(), slug=make_slug(task.title)) for task in tasks]
+    return {'results': await bulk_insert(db, Tasks, rows, ('title', 'slug'))}
+
+
+# Массовое обновление задач
+@router_task.put("/bulk", response_model=BulkResult)
+async def bulk_update_tasks(tasks: List[BulkUpdateTask], db: AsyncSession = Depends(get_db)):
+    check_bulk_size(tasks)
+    rows = []
+    for task in tasks:
+        row = task.model_dump(exclude_unset=True)
+        if 'title' in row:
+            row['slug'] = make_slug(row['title'])
+        rows.append(row)
+    return {'results': await bulk_update(db, Tasks, rows)}
+
+
+# Массовое удаление задач
+@router_task.delete("/bulk", response_model=BulkResult)
+async def bulk_delete_tasks(payload: BulkDelete, db: AsyncSession = Depends(get_db)):
+    check_bulk_size(payload.ids)
+    return {'results': await bulk_delete(db, Tasks, payload.ids)}
@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app import benchmark
+from conftest import migrate
+
+
+def response(status, json=None):
+    return httpx.Response(status, json=json, headers={} if json is not None else {'content-type': 'text/plain'})
+
+
+@pytest.mark.parametrize('status, json, expected', [
+    (404, {'detail': 'Not Found'}, True),
+    (405, None, True),
+    (307, None, True),
+    (404, {'detail': 'User was not found'}, False),
+    (200, {}, False),
+])
+def test_is_unmounted(status, json, expected):
+    assert benchmark.is_unmounted(response(status, json)) is expected
+
+
+async def test_seeded_benchmark_runs_without_errors(client, database, monkeypatch):
+    url = f'sqlite:///{database}'
+    monkeypatch.setattr(benchmark, 'migrate', lambda database_url, config_path: migrate(database_url))
+    users, tasks, requests = 20, 50, 3
+    benchmark.seed(url, users, tasks, 2 * (requests + 1), requests + 1)
+
+    ctx = {'run': 1, 'users': users, 'tasks': tasks,
+           'user_pool': list(range(users + 1, users + 2 * (requests + 1) + 1)),
+           'task_pool': list(range(tasks + 1, tasks + requests + 2))}
+    results = await benchmark.run_all(client, ctx, SimpleNamespace(only=None, requests=requests, concurrency=2))
+
+    ran = {result['name']: result for result in results if 'skipped' not in result}
+    assert 'task_r.search_tasks' in ran and 'user_m.export_users' in ran
+    # user_r не подключен в main.py: его сценарии пропускаются, а не меряют редирект
+    assert 'user_r.read_users' not in ran
+    assert {name: result['errors'] for name, result in ran.items() if result['errors']} == {}
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.backend.bulk import bulk_delete, bulk_insert, bulk_update
+from app.backend.db import Base
+from app.models.task import Task
+from app.models.user import User
+
+
+@pytest.fixture
+async def db(tmp_path):
+    engine = create_async_engine(f'sqlite+aiosqlite:///{tmp_path / "bulk.db"}')
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+def user(username, age=30):
+    return {'username': username, 'firstname': 'John', 'lastname': 'Doe', 'age': age,
+            'slug': username.lower().replace(' ', '-')}
+
+
+def statuses(results):
+    return [(item['index'], item['status']) for item in results]
+
+
+async def test_bulk_insert_reports_each_item(db):
+    await bulk_insert(db, User, [user('existing')], ('username', 'slug'))
+    results = await bulk_insert(db, User, [
+        user('alice'), user('existing'), user('alice'), user('Write docs'), user('write-docs'), user('bob')],
+        ('username', 'slug'))
+    assert statuses(results) == [(0, 'created'), (1, 'error'), (2, 'error'),
+                                 (3, 'created'), (4, 'error'), (5, 'created')]
+    assert 'already exists' in results[1]['detail']
+    assert 'in request' in results[2]['detail']
+    assert "slug 'write-docs'" in results[4]['detail']
+
+
+async def test_bulk_insert_checks_existing_slug(db):
+    await bulk_insert(db, User, [user('Write docs')], ('username', 'slug'))
+    results = await bulk_insert(db, User, [user('write-docs'), user('carol')], ('username', 'slug'))
+    assert statuses(results) == [(0, 'error'), (1, 'created')]
+
+
+async def test_bulk_insert_reports_missing_foreign_key_per_item(db):
+    [owner] = await bulk_insert(db, User, [user('owner')], ('username', 'slug'))
+    task = {'content': 'c', 'priority': 1, 'completed': False}
+    results = await bulk_insert(db, Task, [
+        dict(task, title='Valid', slug='valid', user_id=owner['id']),
+        dict(task, title='Orphan', slug='orphan', user_id=424242),
+    ], ('title', 'slug'))
+    assert statuses(results) == [(0, 'created'), (1, 'error')]
+    assert results[1]['detail'] == 'user_id 424242 does not exist'
+
+
+async def test_bulk_update_and_delete(db):
+    first, second = await bulk_insert(db, User, [user('first'), user('second')], ('username', 'slug'))
+    results = await bulk_update(db, User, [
+        {'id': first['id'], 'age': 40}, {'id': 999999, 'age': 40},
+        {'id': first['id'], 'age': 41}, {'id': second['id']}])
+    assert statuses(results) == [(0, 'updated'), (1, 'error'), (2, 'error'), (3, 'error')]
+
+    results = await bulk_delete(db, User, [second['id'], 999999])
+    assert statuses(results) == [(0, 'deleted'), (1, 'error')]
@@ -0,0 +1,97 @@
+import pytest
+
+from app.backend.cache import CacheBackend, LRUCache, UserCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def user(id, age=30):
+    return {'id': id, 'username': f'user{id}', 'slug': f'user{id}', 'age': age}
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+async def test_lru_cache_evicts_and_expires():
+    clock = Clock()
+    cache = LRUCache(maxsize=2, ttl=10, clock=clock)
+    await cache.set('a', 1)
+    await cache.set('b', 2)
+    assert await cache.get('a') == 1
+    await cache.set('c', 3)
+    assert await cache.get('b') is None
+    assert await cache.get('a') == 1
+    clock.now = 10
+    assert await cache.get('a') is None
+    assert cache.stats()['evictions'] == 1
+
+
+async def test_user_cache_reads_through_and_invalidates():
+    cache = UserCache(LRUCache())
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return user(1, age=30 + len(loads))
+
+    assert (await cache.by_slug('user1', load))['age'] == 31
+    assert (await cache.by_id(1, load))['age'] == 31
+    assert (await cache.by_slug('user1', load))['age'] == 31
+    assert len(loads) == 1
+    await cache.invalidate(1)
+    assert (await cache.by_id(1, load))['age'] == 32
+
+
+async def test_warm_skipped_after_new_invalidation():
+    cache = UserCache(LRUCache(), clock=Clock())
+    await cache.invalidate(1)
+    generation = cache.generation(1)
+    await cache.invalidate(1)
+    await cache.warm(user(1), generation)
+    assert await cache.backend.get('user:id:1') is None
+
+    await cache.warm(user(1), cache.generation(1))
+    assert await cache.backend.get('user:id:1') == user(1)
+
+
+async def test_invalidations_are_pruned():
+    clock = Clock()
+    cache = UserCache(LRUCache(), clock=clock, generation_ttl=10)
+    await cache.invalidate(*range(100))
+    clock.now = 11
+    await cache.invalidate(100)
+    assert list(cache._invalidations) == [100]
+
+
+async def test_warm_started_before_pruned_invalidation_is_skipped():
+    clock = Clock()
+    cache = UserCache(LRUCache(), clock=clock, generation_ttl=10)
+    generation = cache.generation(1)
+    await cache.invalidate(1)
+    clock.now = 11
+    await cache.warm(user(1), generation)
+    assert not cache._invalidations
+    assert await cache.backend.get('user:id:1') is None
+
+
+async def test_fill_delay_after_invalidation():
+    clock = Clock()
+    cache = UserCache(LRUCache(), fill_delay=5, clock=clock)
+
+    async def load():
+        return user(1)
+
+    await cache.invalidate(1)
+    await cache.by_id(1, load)
+    assert await cache.backend.get('user:id:1') is None
+    clock.now = 5
+    await cache.by_id(1, load)
+    assert await cache.backend.get('user:id:1') == user(1)
@@ -0,0 +1,30 @@
+import asyncio
+
+from sqlalchemy import insert
+
+
+async def test_concurrent_user_creates(client):
+    async def create(i):
+        return await client.post('/users/create', json={
+            'username': f'user{i}', 'firstname': 'A', 'lastname': 'B', 'age': 20})
+
+    responses = await asyncio.gather(*(create(i) for i in range(100)))
+    assert [response.status_code for response in responses] == [201] * 100
+
+
+async def test_concurrent_task_updates(client, make_user):
+    from app.backend.db import engine
+    from app.models.task import Task
+
+    user = await make_user()
+    with engine.begin() as connection:
+        connection.execute(insert(Task), [
+            {'title': f't{i}', 'content': 'c', 'priority': 0, 'completed': False, 'user_id': user['id'],
+             'slug': f't-{i}'} for i in range(10)])
+    ids = [task['id'] for task in (await client.get('/tasks/tasks/', params={'limit': 10})).json()['items']]
+
+    async def update(i):
+        return await client.put(f'/tasks/tasks/{ids[i % 10]}', json={'title': f'u{i}', 'content': 'c', 'priority': i})
+
+    responses = await asyncio.gather(*(update(i) for i in range(100)))
+    assert [response.status_code for response in responses] == [200] * 100
@@ -0,0 +1,61 @@
+async def test_etag_and_not_modified(client, make_user):
+    user = await make_user()
+    response = await client.get(f'/users/{user["id"]}')
+    assert response.status_code == 200
+    etag = response.headers['etag']
+    assert etag == f'"{user["id"]}-1"'
+    assert 'last-modified' in response.headers
+
+    response = await client.get(f'/users/{user["id"]}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.content == b''
+    response = await client.get(f'/users/{user["id"]}', headers={'If-None-Match': f'W/{etag}'})
+    assert response.status_code == 304
+
+
+async def test_if_match_bumps_version_and_rejects_stale(client, make_user):
+    user = await make_user()
+    etag = (await client.get(f'/users/{user["id"]}')).headers['etag']
+
+    response = await client.put(f'/users/update/{user["id"]}', json={'age': 31}, headers={'If-Match': etag})
+    assert response.status_code == 200, response.text
+    new_etag = response.headers['etag']
+    assert new_etag == f'"{user["id"]}-2"'
+
+    # Старая версия -> 412, данные не меняются
+    response = await client.put(f'/users/update/{user["id"]}', json={'age': 99}, headers={'If-Match': etag})
+    assert response.status_code == 412
+    response = await client.get(f'/users/{user["id"]}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json()['age'] == 31
+    assert response.headers['etag'] == new_etag
+
+
+async def test_if_match_for_another_row_or_weak_tag(client, make_user):
+    user = await make_user()
+    for if_match in ('"999999-1"', f'W/"{user["id"]}-1"', 'garbage'):
+        response = await client.put(f'/users/update/{user["id"]}', json={'age': 31}, headers={'If-Match': if_match})
+        assert response.status_code == 412, if_match
+
+    response = await client.put(f'/users/update/{user["id"]}', json={'age': 31}, headers={'If-Match': '*'})
+    assert response.status_code == 200
+
+
+async def test_task_etag_and_if_match(client, make_user):
+    owner = await make_user()
+    task = (await client.post('/tasks/tasks/', json={
+        'title': 'Write docs', 'content': 'c', 'priority': 1, 'user_id': owner['id']})).json()
+
+    response = await client.get(f'/tasks/tasks/{task["id"]}')
+    assert response.status_code == 200
+    etag = response.headers['etag']
+    response = await client.get(f'/tasks/tasks/{task["id"]}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+    response = await client.put(f'/tasks/tasks/{task["id"]}', headers={'If-Match': etag},
+                                json={'title': 'Write docs', 'content': 'updated', 'priority': 2})
+    assert response.status_code == 200, response.text
+    assert response.headers['etag'] != etag
+    response = await client.put(f'/tasks/tasks/{task["id"]}', headers={'If-Match': etag},
+                                json={'title': 'Write docs', 'content': 'stale', 'priority': 3})
+    assert response.status_code == 412
@@ -0,0 +1,37 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+
+async def test_ndjson_export_includes_every_row_and_column(client, make_user):
+    for i in range(3):
+        await make_user(f'Пользователь {i}')
+
+    response = await client.get('/users/export')
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row['username'] for row in rows] == [f'Пользователь {i}' for i in range(3)]
+    for row in rows:
+        assert row['version'] == 1
+        datetime.fromisoformat(row['updated_at'])
+
+
+async def test_csv_export(client, make_user):
+    user = await make_user()
+
+    response = await client.get('/users/export', params={'format': 'csv'})
+
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert {'id', 'slug', 'version', 'updated_at'} <= set(header)
+    assert len(rows) == 1 and rows[0][header.index('id')] == str(user['id'])
+
+
+async def test_task_export(client, make_user):
+    user = await make_user()
+    await client.post('/tasks/tasks/', json={'title': 't', 'content': 'c', 'priority': 1, 'user_id': user['id']})
+
+    rows = [json.loads(line) for line in (await client.get('/tasks/export')).text.splitlines()]
+    assert len(rows) == 1 and rows[0]['user_id'] == user['id'] and rows[0]['updated_at']
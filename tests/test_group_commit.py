@@ -0,0 +1,68 @@
+import asyncio
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app.backend.group_commit import GroupCommitter
+
+
+def insert_user(username):
+    async def op(db):
+        await db.execute(text(
+            "INSERT INTO users (username, firstname, lastname, age, slug, version) "
+            "VALUES (:name, 'John', 'Doe', 30, :name, 1)"), {'name': username})
+        return username
+    return op
+
+
+async def failing(db):
+    await db.execute(text(
+        "INSERT INTO users (username, firstname, lastname, age, slug, version) "
+        "VALUES ('ghost', 'John', 'Doe', 30, 'ghost', 1)"))
+    raise HTTPException(status_code=400, detail='rejected')
+
+
+# Ошибка одной операции откатывает только ее точку сохранения, остальные коммитятся одной пачкой
+async def test_failed_op_is_rolled_back_alone():
+    committer = GroupCommitter(window_ms=5, max_ops=10)
+    results = await asyncio.gather(
+        committer.submit(insert_user('a')), committer.submit(failing), committer.submit(insert_user('b')),
+        return_exceptions=True)
+    assert results[0] == 'a' and results[2] == 'b'
+    assert isinstance(results[1], HTTPException)
+
+    from app.backend.db import engine
+    with engine.connect() as connection:
+        names = set(connection.exec_driver_sql('SELECT username FROM users').scalars())
+    assert names == {'a', 'b'}
+
+
+async def test_batches_are_limited_by_max_ops():
+    committer = GroupCommitter(window_ms=1000, max_ops=2)
+    # Пачка из двух операций отправляется сразу, не дожидаясь окна
+    results = await asyncio.wait_for(
+        asyncio.gather(committer.submit(insert_user('a')), committer.submit(insert_user('b'))), 0.5)
+    assert results == ['a', 'b']
+
+
+async def test_duplicate_in_batch_fails_only_its_request():
+    committer = GroupCommitter(window_ms=5, max_ops=10)
+    results = await asyncio.gather(
+        committer.submit(insert_user('a')), committer.submit(insert_user('a')), return_exceptions=True)
+    assert results[0] == 'a'
+    assert isinstance(results[1], IntegrityError)
+
+
+# Движок группового коммита подключен к /metrics: его точки сохранения видны в гистограмме SQL
+async def test_group_commit_sql_is_instrumented():
+    from app.backend.metrics import SQL_STATEMENT_SECONDS
+
+    def savepoints():
+        series = SQL_STATEMENT_SECONDS._series.get(('SAVEPOINT',))
+        return 0 if series is None else series[-1]
+
+    before = savepoints()
+    committer = GroupCommitter(window_ms=1, max_ops=10)
+    await committer.submit(insert_user('a'))
+    assert savepoints() == before + 1
@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+from app.backend.id_allocator import CounterAllocator, SnowflakeAllocator, make_allocator
+
+
+def test_counter_allocator_counts_from_start():
+    allocator = CounterAllocator(start=5)
+    assert [allocator.next_id() for _ in range(3)] == [5, 6, 7]
+
+
+def test_counter_allocators_of_workers_do_not_overlap():
+    allocators = [CounterAllocator.for_worker(1, worker_index=i, worker_count=3) for i in range(3)]
+    ids = [allocator.next_id() for allocator in allocators for _ in range(100)]
+    assert len(set(ids)) == len(ids)
+    assert sorted(ids)[:3] == [1, 2, 3]
+
+
+def test_counter_allocator_is_thread_safe():
+    allocator = CounterAllocator()
+    ids = []
+
+    def take():
+        ids.extend(allocator.next_id() for _ in range(1000))
+
+    threads = [threading.Thread(target=take) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(ids) == list(range(1, 8001))
+
+
+def test_snowflake_ids_are_unique_and_increasing():
+    allocator = SnowflakeAllocator(worker_id=3)
+    ids = [allocator.next_id() for _ in range(10000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert all(id < 2 ** 63 for id in ids)
+    assert (ids[0] >> SnowflakeAllocator.SEQUENCE_BITS) & SnowflakeAllocator.MAX_WORKER_ID == 3
+
+
+def test_snowflake_survives_clock_going_back():
+    now = [1800000000.0]
+    allocator = SnowflakeAllocator(worker_id=1, clock=lambda: now[0])
+    first = allocator.next_id()
+    now[0] -= 10
+    assert allocator.next_id() > first
+
+
+def test_snowflake_waits_for_next_millisecond_when_sequence_runs_out():
+    ticks = iter([1800000000.0] * (SnowflakeAllocator.MAX_SEQUENCE + 2) + [1800000000.001] * 10)
+    allocator = SnowflakeAllocator(worker_id=1, clock=lambda: next(ticks))
+    ids = [allocator.next_id() for _ in range(SnowflakeAllocator.MAX_SEQUENCE + 2)]
+    assert len(set(ids)) == len(ids)
+    assert ids[-1] >> 22 == (ids[0] >> 22) + 1
+
+
+def test_snowflake_rejects_bad_worker_id():
+    with pytest.raises(ValueError):
+        SnowflakeAllocator(worker_id=SnowflakeAllocator.MAX_WORKER_ID + 1)
+
+
+def test_make_allocator():
+    assert isinstance(make_allocator('counter'), CounterAllocator)
+    assert isinstance(make_allocator('snowflake'), SnowflakeAllocator)
+    with pytest.raises(ValueError):
+        make_allocator('uuid')
@@ -0,0 +1,83 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from app.backend.idempotency import IdempotencyMiddleware
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def release():
+    return asyncio.Event()
+
+
+@pytest.fixture
+async def client(calls, release):
+    app = FastAPI()
+
+    @app.post('/items', status_code=201)
+    async def create(request: Request):
+        calls.append(await request.json())
+        return {'n': len(calls)}
+
+    @app.post('/slow', status_code=201)
+    async def slow(request: Request):
+        calls.append(await request.json())
+        await release.wait()
+        return {'n': len(calls)}
+
+    @app.post('/broken')
+    async def broken():
+        calls.append(None)
+        raise RuntimeError('boom')
+
+    app.add_middleware(IdempotencyMiddleware)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        yield client
+
+
+async def test_replay_returns_stored_response(client, calls):
+    first = await client.post('/items', json={'a': 1}, headers={'Idempotency-Key': 'k1'})
+    second = await client.post('/items', json={'a': 1}, headers={'Idempotency-Key': 'k1'})
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers['idempotent-replayed'] == 'true'
+    assert len(calls) == 1
+
+    # Без ключа и с другим ключом обработчик выполняется
+    await client.post('/items', json={'a': 1})
+    await client.post('/items', json={'a': 1}, headers={'Idempotency-Key': 'k2'})
+    assert len(calls) == 3
+
+
+async def test_same_key_with_different_body_is_rejected(client, calls):
+    await client.post('/items', json={'a': 1}, headers={'Idempotency-Key': 'k1'})
+    response = await client.post('/items', json={'a': 2}, headers={'Idempotency-Key': 'k1'})
+    assert response.status_code == 422
+    assert len(calls) == 1
+
+
+async def test_concurrent_retries_wait_for_first_request(client, calls, release):
+    requests = [asyncio.create_task(client.post('/slow', json={}, headers={'Idempotency-Key': 'k'}))
+                for _ in range(3)]
+    await asyncio.sleep(0.05)
+    assert len(calls) == 1
+    release.set()
+    responses = await asyncio.gather(*requests)
+    assert len(calls) == 1
+    assert {response.json()['n'] for response in responses} == {1}
+    assert sum('idempotent-replayed' in response.headers for response in responses) == 2
+
+
+async def test_server_errors_are_not_stored(client, calls):
+    for _ in range(2):
+        response = await client.post('/broken', json={}, headers={'Idempotency-Key': 'k'})
+        assert response.status_code == 500
+    assert len(calls) == 2
@@ -0,0 +1,22 @@
+import pytest
+
+from app.backend.jobs import JobPool, LocalQueue, QueueBackend
+
+
+def test_queue_backend_is_abstract():
+    with pytest.raises(TypeError):
+        QueueBackend()
+
+
+async def test_job_pool_runs_and_drops_jobs():
+    done = []
+
+    async def job(value):
+        done.append(value)
+
+    pool = JobPool(LocalQueue(maxsize=1), workers=1)
+    assert pool.submit('job', job, 1)
+    # Обработчик еще не забрал первую задачу: очередь из одного места заполнена
+    assert not pool.submit('job', job, 2)
+    await pool.stop()
+    assert done == [1]
@@ -0,0 +1,45 @@
+from app.backend.id_allocator import CounterAllocator
+from memory_store import UserStore
+
+
+def make_store():
+    return UserStore(CounterAllocator())
+
+
+def test_create_get_and_page():
+    store = make_store()
+    users = [store.create(f'user{i}', 20 + i) for i in range(5)]
+    assert [user.id for user in users] == [1, 2, 3, 4, 5]
+    assert len(store) == 5
+    assert store.get(3).as_dict() == {'id': 3, 'username': 'user2', 'age': 22}
+    assert store.get(42) is None
+    assert [user.id for user in store.page(1, 2)] == [2, 3]
+    assert store.page(10, 2) == []
+
+
+def test_username_index_follows_updates_and_deletes():
+    store = make_store()
+    first = store.create('john', 30)
+    second = store.create('john', 40)
+    assert store.get_by_username('john') == [first, second]
+
+    store.update(first.id, 'jane', 31)
+    assert store.get_by_username('john') == [second]
+    assert store.get_by_username('jane') == [first]
+    assert first.age == 31
+
+    assert store.delete(second.id) is second
+    assert store.get_by_username('john') == []
+    assert 'john' not in store._by_username
+    assert store.delete(second.id) is None
+    assert store.update(second.id, 'x', 1) is None
+
+
+def test_ids_are_not_reused_after_delete_or_clear():
+    store = make_store()
+    user = store.create('john', 30)
+    store.delete(user.id)
+    assert store.create('john', 30).id == 2
+    store.clear()
+    assert len(store) == 0 and store.get_by_username('john') == []
+    assert store.create('john', 30).id == 3
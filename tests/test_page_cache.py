@@ -0,0 +1,35 @@
+from module_16_5 import RenderedPageCache
+
+
+def render(cache, page, size=10):
+    return ''.join(cache.capture(page, size, iter(['<p>', str(page), '</p>'])))
+
+
+def test_rendered_pages_are_bounded():
+    cache = RenderedPageCache(maxsize=2)
+    render(cache, 1)
+    render(cache, 2)
+    assert cache.get(1, 10) == '<p>1</p>'
+    render(cache, 3)
+    # Вытесняется давно не запрошенная страница 2
+    assert cache.get(2, 10) is None
+    assert cache.get(1, 10) == '<p>1</p>'
+    assert cache.get(3, 10) == '<p>3</p>'
+
+
+def test_page_changed_while_rendering_is_not_cached():
+    cache = RenderedPageCache()
+    chunks = cache.capture(1, 10, iter(['a', 'b']))
+    next(chunks)
+    cache.invalidate()
+    assert list(chunks) == ['b']
+    assert cache.get(1, 10) is None
+
+
+def test_etag_differs_between_processes():
+    # Новый экземпляр - как перезапуск или другой воркер: версия снова 0, ETag другой
+    first, second = RenderedPageCache(), RenderedPageCache()
+    assert first.etag(1, 10) != second.etag(1, 10)
+    etag = first.etag(1, 10)
+    first.invalidate()
+    assert first.etag(1, 10) != etag
@@ -0,0 +1,95 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, insert, select
+
+from app.backend.pagination import decode_cursor, encode_cursor, make_page, paginate
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(3, 42), 2) == [3, 42]
+
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', encode_cursor(1), encode_cursor(1, 2, 3)])
+def test_invalid_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, 2)
+    assert error.value.status_code == 400
+
+
+def test_keyset_pages_on_priority_and_id():
+    items = Table('items', MetaData(), Column('id', Integer, primary_key=True), Column('priority', Integer))
+    engine = create_engine('sqlite://')
+    items.metadata.create_all(engine)
+    keys = [items.c.priority, items.c.id]
+    with engine.begin() as connection:
+        connection.execute(insert(items), [{'priority': priority} for priority in [2, 1, 2, 0, 1, 2, 0]])
+
+        seen, cursor = [], None
+        while True:
+            rows = connection.execute(paginate(select(items), keys, cursor, 3)).all()
+            page = make_page(rows, keys, 3)
+            assert len(page['items']) <= 3
+            seen.extend((row.priority, row.id) for row in page['items'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+
+    assert seen == sorted(seen)
+    assert len(seen) == 7
+
+
+def insert_tasks(user_id, priorities):
+    from app.backend.db import engine
+    from app.models.task import Task
+
+    with engine.begin() as connection:
+        connection.execute(insert(Task), [
+            {'title': f'task {i}', 'content': 'c', 'priority': priority, 'completed': i % 2 == 0,
+             'user_id': user_id, 'slug': f'task-{i}'}
+            for i, priority in enumerate(priorities)
+        ])
+
+
+async def test_users_pages_follow_cursor(client, make_user):
+    created = [(await make_user(f'user{i}'))['id'] for i in range(5)]
+
+    seen, cursor = [], None
+    while True:
+        params = {'limit': 2} if cursor is None else {'limit': 2, 'cursor': cursor}
+        page = (await client.get('/users/', params=params)).json()
+        assert len(page['items']) <= 2
+        seen.extend(item['id'] for item in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    assert seen == sorted(created)
+
+
+async def test_tasks_keyset_on_priority_and_id(client, make_user):
+    user = await make_user()
+    insert_tasks(user['id'], [2, 1, 2, 0, 1, 2, 0])
+
+    first = (await client.get('/tasks/tasks/', params={'limit': 4})).json()
+    second = (await client.get('/tasks/tasks/', params={'limit': 4, 'cursor': first['next_cursor']})).json()
+
+    items = first['items'] + second['items']
+    assert second['next_cursor'] is None
+    assert [(task['priority'], task['id']) for task in items] == \
+        sorted((task['priority'], task['id']) for task in items)
+    assert len({task['id'] for task in items}) == 7
+
+
+async def test_invalid_cursor_in_request_is_400(client):
+    response = await client.get('/users/', params={'cursor': 'not-a-cursor'})
+    assert response.status_code == 400
+
+
+async def test_tasks_filters(client, make_user):
+    user, other = await make_user('a'), await make_user('b')
+    insert_tasks(user['id'], [1, 1, 1, 1])
+
+    page = (await client.get('/tasks/tasks/', params={'user_id': user['id'], 'completed': 'true'})).json()
+    assert len(page['items']) == 2
+    assert all(task['completed'] and task['user_id'] == user['id'] for task in page['items'])
+    assert (await client.get('/tasks/tasks/', params={'user_id': other['id']})).json()['items'] == []
@@ -0,0 +1,54 @@
+import time
+
+from starlette.requests import Request
+
+from app.backend import replicas
+from app.backend.replicas import LAST_WRITE_COOKIE, ReadYourWritesMiddleware, read_from_primary
+
+
+def request_with_cookie(value=None):
+    headers = [] if value is None else [(b'cookie', f'{LAST_WRITE_COOKIE}={value}'.encode())]
+    return Request({'type': 'http', 'method': 'GET', 'path': '/', 'headers': headers})
+
+
+def test_read_from_primary_while_cookie_is_fresh():
+    assert read_from_primary(request_with_cookie(f'{time.time():.3f}'))
+    assert not read_from_primary(request_with_cookie(f'{time.time() - 3600:.3f}'))
+    assert not read_from_primary(request_with_cookie())
+    assert not read_from_primary(request_with_cookie('garbage'))
+
+
+def test_read_your_writes_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(replicas, 'READ_YOUR_WRITES', False)
+    assert not read_from_primary(request_with_cookie(f'{time.time():.3f}'))
+
+
+# Без реплик main.py middleware не подключает: проверяем его на отдельном приложении
+async def test_successful_write_sets_last_write_cookie():
+    import httpx
+    from fastapi import FastAPI, HTTPException
+
+    app = FastAPI()
+
+    @app.post('/ok')
+    async def ok():
+        return {}
+
+    @app.post('/fail')
+    async def fail():
+        raise HTTPException(status_code=400)
+
+    @app.get('/read')
+    async def read():
+        return {}
+
+    app.add_middleware(ReadYourWritesMiddleware)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+        response = await client.post('/ok')
+        assert response.status_code == 200
+        assert abs(float(response.cookies[LAST_WRITE_COOKIE]) - time.time()) < 5
+        assert read_from_primary(request_with_cookie(response.cookies[LAST_WRITE_COOKIE]))
+
+        # Неудачная запись и чтение cookie не ставят
+        assert LAST_WRITE_COOKIE not in (await client.post('/fail')).cookies
+        assert LAST_WRITE_COOKIE not in (await client.get('/read')).cookies
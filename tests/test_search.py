@@ -0,0 +1,40 @@
+async def create_tasks(client, make_user, items):
+    owner = await make_user()
+    for title, content, priority in items:
+        response = await client.post('/tasks/tasks/', json={
+            'title': title, 'content': content, 'priority': priority, 'user_id': owner['id']})
+        assert response.status_code == 200, response.text
+
+
+async def test_search_ranks_and_pages(client, make_user):
+    await create_tasks(client, make_user, [
+        ('Deploy', 'release the backend', 1),
+        ('Release notes', 'release release release', 1),
+        ('Groceries', 'milk and bread', 1),
+        ('Release party', 'cake', 1),
+    ])
+    response = await client.get('/tasks/search', params={'q': 'release'})
+    assert response.status_code == 200
+    titles = [task['title'] for task in response.json()['items']]
+    assert set(titles) == {'Deploy', 'Release notes', 'Release party'}
+    assert titles[0] == 'Release notes'
+
+    first = (await client.get('/tasks/search', params={'q': 'release', 'limit': 2})).json()
+    assert len(first['items']) == 2 and first['next_cursor']
+    second = (await client.get('/tasks/search', params={
+        'q': 'release', 'limit': 2, 'cursor': first['next_cursor']})).json()
+    assert [task['title'] for task in first['items'] + second['items']] == titles
+    assert second['next_cursor'] is None
+
+
+async def test_search_quotes_fts_operators(client, make_user):
+    await create_tasks(client, make_user, [('Write docs', 'NOT OR AND', 1)])
+    for q in ('NOT', 'docs"', '"', 'title:docs*'):
+        response = await client.get('/tasks/search', params={'q': q})
+        assert response.status_code == 200, (q, response.text)
+
+
+async def test_search_rejects_blank_query(client):
+    for q in ('', '   ', '\t'):
+        response = await client.get('/tasks/search', params={'q': q})
+        assert response.status_code == 422, q
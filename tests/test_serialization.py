@@ -0,0 +1,31 @@
+import pytest
+
+USER_FIELDS = {'id', 'username', 'firstname', 'lastname', 'age', 'slug'}
+TASK_FIELDS = {'id', 'title', 'content', 'priority', 'completed', 'user_id', 'slug'}
+
+
+@pytest.fixture
+def fast_json(monkeypatch):
+    import app.routers.task
+    import app.routers.user
+
+    monkeypatch.setattr(app.routers.user, 'FAST_JSON', True)
+    monkeypatch.setattr(app.routers.task, 'FAST_JSON', True)
+
+
+# В быстром режиме ответ не проходит через response_model: лишние колонки отсекает выборка
+async def test_fast_json_users_page_has_only_response_fields(client, make_user, fast_json):
+    await make_user()
+    page = (await client.get('/users/')).json()
+    assert set(page['items'][0]) == USER_FIELDS
+
+
+async def test_fast_json_tasks_have_only_response_fields(client, make_user, fast_json):
+    owner = await make_user()
+    response = await client.post('/tasks/tasks/', json={
+        'title': 'Write docs', 'content': 'c', 'priority': 1, 'user_id': owner['id']})
+    assert response.status_code == 200, response.text
+    assert set(response.json()) == TASK_FIELDS
+
+    page = (await client.get('/tasks/tasks/')).json()
+    assert set(page['items'][0]) == TASK_FIELDS
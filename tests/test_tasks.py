@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+
+@pytest.fixture(params=[False, True], ids=['direct', 'group_commit'])
+def group_commit_mode(request, monkeypatch):
+    import app.routers.task as task_router
+
+    monkeypatch.setattr(task_router, 'GROUP_COMMIT', request.param)
+    return request.param
+
+
+def new_task(user_id, i=0, **fields):
+    return {'title': f'Задача номер {i}', 'content': 'content', 'priority': i % 3, 'user_id': user_id, **fields}
+
+
+async def test_create_task(client, make_user, group_commit_mode):
+    user = await make_user()
+
+    response = await client.post('/tasks/tasks/', json=new_task(user['id'], completed=True))
+
+    assert response.status_code == 200, response.text
+    task = response.json()
+    assert task['user_id'] == user['id']
+    assert task['completed'] is True
+    assert task['slug'] == 'zadacha-nomer-0'
+    assert set(task) == {'id', 'title', 'content', 'priority', 'completed', 'user_id', 'slug'}
+
+
+async def test_create_task_duplicate_title_is_400(client, make_user, group_commit_mode):
+    user = await make_user()
+    assert (await client.post('/tasks/tasks/', json=new_task(user['id']))).status_code == 200
+
+    response = await client.post('/tasks/tasks/', json=new_task(user['id']))
+    assert response.status_code == 400
+
+
+async def test_concurrent_creates_get_their_own_results(client, make_user, group_commit_mode):
+    user = await make_user()
+    # Одинаковые заголовки у 0 и 20 и несуществующий пользователь: ошибку получают только эти запросы
+    payloads = [new_task(user['id'], i % 20) for i in range(21)] + [new_task(999999, 100)]
+
+    responses = await asyncio.gather(*(client.post('/tasks/tasks/', json=payload) for payload in payloads))
+
+    statuses = [response.status_code for response in responses]
+    assert statuses[:21].count(200) == 20
+    ok, duplicate = sorted((statuses[0], statuses[20]))
+    assert ok == 200 and duplicate >= 400
+    if group_commit_mode:
+        # В одной транзакции пачки дубль виден проверке заголовка
+        assert duplicate == 400
+    assert statuses[21] >= 400
+    created = [response.json() for response in responses if response.status_code == 200]
+    assert len({task['id'] for task in created}) == 20
+    for response, payload in zip(responses, payloads):
+        if response.status_code == 200:
+            assert response.json()['title'] == payload['title']
+
+
+async def test_update_task(client, make_user, group_commit_mode):
+    user = await make_user()
+    task = (await client.post('/tasks/tasks/', json=new_task(user['id']))).json()
+
+    response = await client.put(f'/tasks/tasks/{task["id"]}', json={'title': 'new', 'content': 'c', 'priority': 5})
+    assert response.status_code == 200
+    assert response.json()['priority'] == 5
+    assert (await client.put('/tasks/tasks/999999', json={'title': 'x', 'content': 'c', 'priority': 1})).status_code == 404
@@ -0,0 +1,28 @@
+def user(username='John Doe', age=30):
+    return {'username': username, 'firstname': 'John', 'lastname': 'Doe', 'age': age}
+
+
+async def test_upsert_creates_then_updates(client):
+    response = await client.put('/users/by-slug/john-doe', json=user())
+    assert response.status_code == 200, response.text
+    created = response.json()
+    assert created['slug'] == 'john-doe'
+
+    response = await client.put('/users/by-slug/john-doe', json=user(age=31))
+    assert response.status_code == 200
+    assert response.json()['id'] == created['id']
+    assert response.json()['age'] == 31
+    assert len((await client.get('/users/')).json()['items']) == 1
+
+
+async def test_upsert_rejects_slug_unrelated_to_username(client):
+    response = await client.put('/users/by-slug/Hello World', json=user('a'))
+    assert response.status_code == 422
+    assert (await client.get('/users/')).json()['items'] == []
+
+
+async def test_upsert_does_not_rename_existing_user(client, make_user):
+    existing = await make_user('john')
+    response = await client.put('/users/by-slug/john', json=user('someone-else'))
+    assert response.status_code == 422
+    assert (await client.get(f'/users/{existing["id"]}')).json()['username'] == 'john'
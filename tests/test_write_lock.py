@@ -0,0 +1,129 @@
+import asyncio
+import fcntl
+import os
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.backend.write_lock import ProcessWriteLock, WriteLockMiddleware
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'test.db.write-lock')
+
+
+# Проверка снаружи: свободен ли flock (отдельный дескриптор, как у другого процесса)
+def flock_is_free(path):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return True
+    finally:
+        os.close(fd)
+
+
+async def test_two_instances_exclude_each_other(path):
+    first, second = ProcessWriteLock(path), ProcessWriteLock(path)
+    await first.acquire()
+    waiting = asyncio.create_task(second.acquire())
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+
+    first.release()
+    await asyncio.wait_for(waiting, 1)
+    assert not flock_is_free(path)
+    second.release()
+    assert flock_is_free(path)
+
+
+async def test_flock_is_kept_for_queued_writes_up_to_max_batch(path):
+    lock = ProcessWriteLock(path, max_batch=2)
+    await lock.acquire()
+    second = asyncio.create_task(lock.acquire())
+    await asyncio.sleep(0)
+    # Есть ожидающая запись своего процесса: flock не отпускается
+    lock.release()
+    await second
+    assert not flock_is_free(path)
+
+    third = asyncio.create_task(lock.acquire())
+    await asyncio.sleep(0)
+    # Пачка из max_batch записей закончилась: flock отдается другим процессам, хотя третья запись ждет
+    lock.release()
+    assert flock_is_free(path)
+    await third
+    lock.release()
+    assert flock_is_free(path)
+
+
+async def test_cancel_while_polling_flock_leaves_it_free(path):
+    other = ProcessWriteLock(path)
+    await other.acquire()
+    lock = ProcessWriteLock(path)
+    waiting = asyncio.create_task(lock.acquire())
+    await asyncio.sleep(0.02)
+    waiting.cancel()
+    await asyncio.gather(waiting, return_exceptions=True)
+    other.release()
+    assert flock_is_free(path)
+    assert not lock._held and not lock._queue.locked()
+
+
+async def test_cancel_last_queued_write_releases_kept_flock(path):
+    lock = ProcessWriteLock(path)
+    await lock.acquire()
+    waiting = asyncio.create_task(lock.acquire())
+    await asyncio.sleep(0)
+    # flock оставлен ожидающему, но его отменили до того, как он получил очередь
+    lock.release()
+    waiting.cancel()
+    await asyncio.gather(waiting, return_exceptions=True)
+    assert flock_is_free(path)
+    assert not lock._held and not lock._queue.locked()
+
+
+class CountingLock:
+    def __init__(self):
+        self.acquired = 0
+        self.held = False
+
+    async def acquire(self):
+        self.acquired += 1
+        self.held = True
+
+    def release(self):
+        self.held = False
+
+
+async def test_middleware_skips_reads_and_excluded_routes():
+    lock = CountingLock()
+    app = FastAPI()
+    held_in_handler = []
+
+    @app.get('/items')
+    async def read():
+        held_in_handler.append(lock.held)
+
+    @app.post('/items')
+    async def write():
+        held_in_handler.append(lock.held)
+
+    @app.post('/tasks/')
+    async def grouped():
+        held_in_handler.append(lock.held)
+
+    app.add_middleware(WriteLockMiddleware, lock=lock, exclude=[('POST', r'^/tasks/$')])
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+        await client.get('/items')
+        await client.post('/tasks/')
+        assert lock.acquired == 0
+        await client.post('/items')
+        assert lock.acquired == 1
+    assert held_in_handler == [False, False, True]
+    assert not lock.held
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, DateTime, func, literal_column
 from sqlalchemy.orm import relationship
-from app.backend.db import Base
+from app.backend.db import Base, ID_TYPE, model_id_default
 from pydantic import BaseModel
 from typing import Optional
 
@@ -33,11 +33,15 @@ class User(Base):
     __tablename__ = 'users'  # Исправлено: добавлены двойные подчеркивания
     __table_args__ = {"extend_existing": True}  # Исправлено: добавлены двойные подчеркивания
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(ID_TYPE, primary_key=True, default=model_id_default())
     username = Column(String, nullable=False)
     firstname = Column(String, nullable=False)
     lastname = Column(String, nullable=False)
     age = Column(Integer, nullable=False)
     slug = Column(String, unique=True, index=True)
+    # Версия строки для ETag/If-Match и время последнего изменения для Last-Modified
+    version = Column(Integer, nullable=False, default=1, server_default='1', onupdate=literal_column('version') + 1)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
-    tasks = relationship('Task', back_populates='user')
+    # Задачи удаляет БД (ON DELETE CASCADE), ORM не загружает их перед удалением
+    tasks = relationship('Task', back_populates='user', cascade='all, delete-orphan', passive_deletes=True)
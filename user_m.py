@@ -1,45 +1,97 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, insert, update, delete
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
-from typing import Annotated
-from slugify import slugify
-from app.backend.db_depends import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from typing import Annotated, Literal, Optional
+from app.backend.slugs import make_slug
+from app.backend.db_depends import get_db, get_read_db
+from app.backend.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, make_page
+from app.backend.export import export_response
+from app.backend.bulk import check_bulk_size, bulk_insert, bulk_update, bulk_delete
+from app.backend.cache import user_cache, row_to_dict
+from app.backend.jobs import after_commit
+from app.backend.crud import update_returning, delete_returning, upsert_returning
+from app.backend.serialization import FAST_JSON, select_columns, page_response
+from app.backend.conditional import not_modified, set_validators, expected_version
 from app.models import User
-from app.models.user import UserResponse
-from app.schemas import CreateUser, UpdateUser, UserResponse
-import uvicorn
-
-# Создаем экземпляр приложения
-app = FastAPI(
-    title="User API",  # название API
-    description="API для управления пользователями",  # описание API
-    version="1.0.0"  # версия API
-)
+from app.schemas import CreateUser, UpdateUser, UserResponse, UserWithTasksPage, TaskResponse, BulkUpdateUser, BulkDelete, BulkResult
 
 router = APIRouter(prefix='/users', tags=['users'])
 
-# Получение всех пользователей
-@router.get('/', response_model=list[UserResponse])
-async def all_users(db: Annotated[Session, Depends(get_db)]):
-    users = db.scalars(select(User)).all()
-    return users
+# Получение пользователей постранично (курсор по id), ?include=tasks - вместе с задачами
+@router.get('/', response_model=UserWithTasksPage, response_model_exclude_unset=True)
+async def all_users(
+        db: Annotated[AsyncSession, Depends(get_read_db)],
+        cursor: Optional[str] = None,
+        limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+        include: Optional[Literal['tasks']] = None
+):
+    if FAST_JSON and include is None:
+        rows = (await db.execute(paginate(select_columns(User, UserResponse), [User.id], cursor, limit))).all()
+        return page_response(make_page(rows, [User.id], limit))
+
+    stmt = select(User)
+    if include == 'tasks':
+        # Задачи всей страницы одним запросом SELECT ... WHERE user_id IN (...)
+        stmt = stmt.options(selectinload(User.tasks))
+    users = (await db.scalars(paginate(stmt, [User.id], cursor, limit))).all()
+
+    page = make_page(users, [User.id], limit)
+    if include == 'tasks':
+        page['items'] = [dict(row_to_dict(user), tasks=[row_to_dict(task) for task in user.tasks])
+                         for user in page['items']]
+    else:
+        page['items'] = [row_to_dict(user) for user in page['items']]
+    return page
+
+# Потоковая выгрузка всех пользователей в NDJSON или CSV
+@router.get('/export')
+async def export_users(fmt: Annotated[Literal['ndjson', 'csv'], Query(alias='format')] = 'ndjson'):
+    return export_response(User, fmt)
+
+# Получение пользователя по slug (через кэш)
+@router.get('/slug/{slug}', response_model=UserResponse)
+async def user_by_slug(slug: str, db: Annotated[AsyncSession, Depends(get_read_db)]):
+    async def load():
+        user = await db.scalar(select(User).where(User.slug == slug))
+        return None if user is None else row_to_dict(user)
+
+    user = await user_cache.by_slug(slug, load)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User was not found")
+
+    return user
 
-# Получение пользователя по ID
+# Получение пользователя по ID (через кэш), 304 при совпадении ETag
 @router.get('/{user_id}', response_model=UserResponse)
-async def user_by_id(user_id: int, db: Annotated[Session, Depends(get_db)]):
-    user = db.scalar(select(User).where(User.id == user_id))
+async def user_by_id(user_id: int, request: Request, response: Response,
+                     db: Annotated[AsyncSession, Depends(get_read_db)]):
+    async def load():
+        user = await db.scalar(select(User).where(User.id == user_id))
+        return None if user is None else row_to_dict(user)
+
+    user = await user_cache.by_id(user_id, load)
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User was not found")
 
-    return user
+    return not_modified(request, response, user) or user
+
+# Задачи пользователя (загружаются через selectinload)
+@router.get('/{user_id}/tasks', response_model=list[TaskResponse])
+async def user_tasks(user_id: int, db: Annotated[AsyncSession, Depends(get_read_db)]):
+    user = await db.scalar(select(User).options(selectinload(User.tasks)).where(User.id == user_id))
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User was not found")
+
+    return user.tasks
 
 # Создание нового пользователя
 @router.post('/create', response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def create_user(user: CreateUser, db: Annotated[Session, Depends(get_db)]):
+async def create_user(user: CreateUser, db: Annotated[AsyncSession, Depends(get_db)]):
     try:
-        slug = slugify(user.username)
-        existing_user = db.scalar(select(User).where(User.username == user.username))
+        slug = make_slug(user.username)
+        existing_user = await db.scalar(select(User).where(User.username == user.username))
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -54,46 +106,69 @@ async def create_user(user: CreateUser, db: Annotated[Session, Depends(get_db)])
             slug=slug
         )
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
 
         return new_user  # Возвращаем ORM объект
 
+    except IntegrityError as e:
+        # Параллельный запрос успел создать пользователя с тем же slug
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already exists"
+        ) from e
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}"
         ) from e
 
 
-# Обновление пользователя
-@router.put('/update/{user_id}', response_model=CreateUser)
-async def update_user(user_id: int, user: UpdateUser, db: Annotated[Session, Depends(get_db)]):
+# Создание или обновление пользователя по slug одним запросом (идемпотентно).
+# slug в пути должен совпадать со slug из username: иначе upsert создал бы второго
+# пользователя с тем же username или молча переименовал бы существующего
+@router.put('/by-slug/{slug}', response_model=UserResponse)
+async def upsert_user(slug: str, user: CreateUser, db: Annotated[AsyncSession, Depends(get_db)]):
+    if slug != make_slug(user.username):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=f"Slug '{slug}' does not match username '{user.username}'")
     try:
-        # Проверяем существование пользователя
-        existing_user = db.scalar(select(User).where(User.id == user_id))
-        if existing_user is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User was not found"
-            )
+        upserted_user = await upsert_returning(db, User, dict(user.model_dump(), slug=slug), ['slug'])
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred: {str(e)}"
+        ) from e
+
+    await user_cache.invalidate(upserted_user['id'])
+    after_commit('user_cache.warm', user_cache.warm, upserted_user, user_cache.generation(upserted_user['id']))
+    return upserted_user
 
+
+# Обновление пользователя (If-Match - только если версия не изменилась, иначе 412)
+@router.put('/update/{user_id}', response_model=CreateUser)
+async def update_user(user_id: int, user: UpdateUser, response: Response,
+                      db: Annotated[AsyncSession, Depends(get_db)],
+                      if_match: Annotated[Optional[str], Header()] = None):
+    try:
         # Создаем словарь со значениями для обновления
         update_data = user.model_dump(exclude_unset=True)  # Исключаем поля со значением None
         if 'username' in update_data:
-            update_data['slug'] = slugify(update_data['username'])
-
-        # Обновляем пользователя
-        stmt = update(User).where(User.id == user_id).values(**update_data)
-        db.execute(stmt)
-        db.commit()
-
-        # Возвращаем обновленного пользователя
-        updated_user = db.scalar(select(User).where(User.id == user_id))
+            update_data['slug'] = make_slug(update_data['username'])
+
+        # Обновляем пользователя и сразу получаем новую строку (404, если ее нет)
+        updated_user = await update_returning(db, User, user_id, update_data, "User was not found",
+                                              expected_version(if_match, user_id))
+        await user_cache.invalidate(user_id)
+        # Прогрев кэша новой строкой - вне пути запроса
+        after_commit('user_cache.warm', user_cache.warm, updated_user, user_cache.generation(user_id))
+        set_validators(response, updated_user)
         return updated_user
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}"
@@ -101,36 +176,49 @@ async def update_user(user_id: int, user: UpdateUser, db: Annotated[Session, Dep
 
 # Удаление пользователя
 @router.delete('/delete/{user_id}', status_code=status.HTTP_204_NO_CONTENT)
-async def delete_user(user_id: int, db: Annotated[Session, Depends(get_db)]):
+async def delete_user(user_id: int, db: Annotated[AsyncSession, Depends(get_db)]):
     try:
-        # Проверяем существование пользователя
-        existing_user = db.scalar(select(User).where(User.id == user_id))
-        if existing_user is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User was not found"
-            )
-
-        # Удаляем пользователя
-        stmt = delete(User).where(User.id == user_id)
-        db.execute(stmt)
-        db.commit()
+        # Удаляем пользователя одним запросом, задачи удаляются каскадно (404, если его нет)
+        await delete_returning(db, User, user_id, "User was not found")
+        await user_cache.invalidate(user_id)
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}"
         ) from e
 
-# Подключаем роутер к приложению
-app.include_router(router)
-
-# Запуск приложения
+# Массовое создание пользователей в одной транзакции
+@router.post('/bulk', response_model=BulkResult)
+async def bulk_create_users(users: list[CreateUser], db: Annotated[AsyncSession, Depends(get_db)]):
+    check_bulk_size(users)
+    rows = [dict(user.model_dump(), slug=make_slug(user.username)) for user in users]
+    return {'results': await bulk_insert(db, User, rows, ('username', 'slug'))}
+
+# Массовое обновление пользователей
+@router.put('/bulk', response_model=BulkResult)
+async def bulk_update_users(users: list[BulkUpdateUser], db: Annotated[AsyncSession, Depends(get_db)]):
+    check_bulk_size(users)
+    rows = []
+    for user in users:
+        row = user.model_dump(exclude_unset=True)
+        if 'username' in row:
+            row['slug'] = make_slug(row['username'])
+        rows.append(row)
+    results = await bulk_update(db, User, rows)
+    await user_cache.invalidate(*(row['id'] for row in rows))
+    return {'results': results}
+
+# Массовое удаление пользователей
+@router.delete('/bulk', response_model=BulkResult)
+async def bulk_delete_users(payload: BulkDelete, db: Annotated[AsyncSession, Depends(get_db)]):
+    check_bulk_size(payload.ids)
+    results = await bulk_delete(db, User, payload.ids)
+    await user_cache.invalidate(*payload.ids)
+    return {'results': results}
+
+# Запуск приложения: воркеры по числу ядер (python -m app.serve --reload для разработки)
 if __name__ == "__main__":
-    import sys
-    import os
-
-    # Добавляем родительскую директорию в PYTHONPATH
-    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.serve import main
 
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
+    main()
@@ -1,22 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends, FastAPI
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from slugify import slugify
-from typing import List
+from app.backend.slugs import make_slug
+from typing import Optional
 from app.schemas.user_s import UserResponse, CreateUser, UpdateUser
-from app.backend.db_depends import get_db
+from app.backend.db_depends import get_db, get_read_db
+from app.backend.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, make_page
+from app.backend.cache import user_cache, row_to_dict
+from app.backend.jobs import after_commit
+from app.backend.crud import update_returning, delete_returning
+from app.backend.serialization import FAST_JSON, select_columns, page_response, row_response
+from app.backend.conditional import not_modified, set_validators, expected_version
+from app.models.registry import resolve_model
+from app.schemas import UserPage
 
 
-# Создаем экземпляр приложения
-app = FastAPI(
-    title="User API",  # название API
-    description="API для управления пользователями",  # описание API
-    version="1.0.0"  # версия API
-)
-
 router_user = APIRouter(prefix='/users', tags=['users'])
 
+# Модель разрешается один раз при создании роутера
+Users = resolve_model('User')
+
 # Фейковые данные пользователей
 fake_users = [
     {"id": 1, "username": "user1", "firstname": "john", "lastname": "Guy", "age": 25,
@@ -57,116 +61,85 @@ fake_tasks = [
 ]
 
 
-# Получение списка пользователей
-@router_user.get("/users/", response_model=List[UserResponse])
-def read_users(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    import importlib
-    # Динамический импорт класса Users
-    user_module = importlib.import_module('app.models.user_m')
-    Users = user_module.Users  # Получаем доступ к классу Users
+# Получение списка пользователей (курсор по id)
+@router_user.get("/users/", response_model=UserPage)
+async def read_users(cursor: Optional[str] = None,
+                     limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                     db: AsyncSession = Depends(get_read_db)):
+    if FAST_JSON:
+        rows = (await db.execute(paginate(select_columns(Users, UserResponse), [Users.id], cursor, limit))).all()
+        return page_response(make_page(rows, [Users.id], limit))
 
-    result = db.execute(select(Users).offset(skip).limit(limit))
+    result = await db.execute(paginate(select(Users), [Users.id], cursor, limit))
     users = result.scalars().all()
-    return users
+    return make_page(users, [Users.id], limit)
 
 
 @router_user.get("/users/{user_id}", response_model=UserResponse)
-def read_user(user_id: int, db: Session = Depends(get_db)):
-    import importlib
-    # Динамический импорт класса Users
-    user_module = importlib.import_module('app.models.user_m')
-    Users = user_module.Users  # Получаем доступ к классу Users
-
-    # Выполнение запроса к базе данных
-    result = db.execute(select(Users).where(Users.id == user_id))  # Исправлено
-    user = result.scalars().first()  # Исправлено
+async def read_user(user_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    # Выполнение запроса к базе данных при промахе кэша
+    async def load():
+        result = await db.execute(select(Users).where(Users.id == user_id))
+        user = result.scalars().first()
+        return None if user is None else row_to_dict(user)
+
+    user = await user_cache.by_id(user_id, load)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    # Клиент с актуальной версией получает 304 без тела
+    return not_modified(request, response, user) or user
 
 
 from sqlalchemy import and_
 
 
 @router_user.post("/users/", response_model=UserResponse)
-def create_user(user: CreateUser, db: Session = Depends(get_db)):
-    import importlib
-    # Динамический импорт класса Users
-    user_module = importlib.import_module('app.models.user_m')
-    Users = user_module.Users  # Получаем доступ к классу Users
-
+async def create_user(user: CreateUser, db: AsyncSession = Depends(get_db)):
     # Проверяем, существует ли пользователь с таким name и email
-    existing_user = db.query(Users).filter(
+    existing_user = await db.scalar(select(Users).where(
         and_(Users.username == user.username, Users.firstname == user.firstname)
-    ).first()
+    ))
     if existing_user:
         raise HTTPException(status_code=400, detail="Пользователь с таким username и firsname уже существует")
 
     # Генерируем slug на основе имени
-    user_slug = slugify(user.username)
+    user_slug = make_slug(user.username)
 
     # Создаем нового пользователя, включая slug
     new_user = Users(**user.model_dump(), slug=user_slug)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+
+    if FAST_JSON:
+        return row_response(row_to_dict(new_user), UserResponse)
 
     # Возвращаем ответ с обязательными полями
     return UserResponse(id=new_user.id, firstname=new_user.firstname, username=new_user.username,
                         lastname=new_user.lastname, age=new_user.age, slug=new_user.slug)
 
 @router_user.put("/users/{user_id}", response_model=UserResponse)
-def update_user(user_id: int, user: UpdateUser, db: Session = Depends(get_db)):
-    import importlib
-    # Динамический импорт класса Users
-    user_module = importlib.import_module('app.models.user_m')
-    Users = user_module.Users  # Получаем доступ к классу Users
-
-    existing_user = db.get(Users, user_id)
-    if existing_user is None:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    # Обновляем поля пользователя
-    for key, value in user.dict(exclude_unset=True).items():
-        setattr(existing_user, key, value)
-
-    # Обновляем slug на основе username
-    existing_user.slug = slugify(existing_user.username)
-
-    db.commit()  # Не забудьте вызвать commit как метод
-    db.refresh(existing_user)  # Не забудьте вызвать refresh как метод
-
-    return UserResponse(
-        id=existing_user.id,
-        username=existing_user.username,
-        firstname=existing_user.firstname,
-        lastname=existing_user.lastname,
-        age=existing_user.age,
-        slug=existing_user.slug
-    )
+async def update_user(user_id: int, user: UpdateUser, response: Response, db: AsyncSession = Depends(get_db),
+                      if_match: Optional[str] = Header(None)):
+    # Поля для обновления, slug пересчитываем на основе username
+    update_data = user.model_dump(exclude_unset=True)
+    if 'username' in update_data:
+        update_data['slug'] = make_slug(update_data['username'])
+
+    # If-Match с устаревшей версией -> 412
+    updated_user = await update_returning(db, Users, user_id, update_data, "User not found",
+                                          expected_version(if_match, user_id))
+    await user_cache.invalidate(user_id)
+    # Прогрев кэша новой строкой - вне пути запроса
+    after_commit('user_cache.warm', user_cache.warm, updated_user, user_cache.generation(user_id))
+    set_validators(response, updated_user)
+
+    return UserResponse(**updated_user)
 
 @router_user.delete("/users/{user_id}/tasks", response_model=dict)
-def delete(user_id: int, db: Session = Depends(get_db)):
-    import importlib
-    # Динамический импорт класса Users
-    user_module = importlib.import_module('app.models.user_m')
-    Users = user_module.Users  # Получаем доступ к классу Users
-
-    # Находим существующего пользователя
-    existing_user = db.get(Users, user_id)
-    if existing_user is None:
-        raise HTTPException(status_code=404, detail="User not found")
-
-        # Динамический импорт модуля task_m
-    task_module = importlib.import_module('app.models.task_m')  # Импортируем модуль task_m
-    Tasks = task_module.Tasks  # Получаем доступ к классу Tasks
-
-    # Удаляем связанные задачи
-    db.query(Tasks).filter(Tasks.user_id == user_id).delete(synchronize_session=False)
-
-    # Удаляем пользователя
-    db.delete(existing_user)  # Удаляем пользователя, если он существует
-
-    db.commit()  # Коммитим изменения
+async def delete(user_id: int, db: AsyncSession = Depends(get_db)):
+    # Удаляем пользователя одним запросом, связанные задачи удаляет ON DELETE CASCADE
+    await delete_returning(db, Users, user_id, "User not found")
+    await user_cache.invalidate(user_id)
 
     return {"detail": "User and associated tasks deleted successfully"}
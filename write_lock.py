@@ -0,0 +1,125 @@
+# app/backend/write_lock.py
+import asyncio
+import fcntl
+import os
+import re
+
+from sqlalchemy.engine import make_url
+
+from app.backend.db import DATABASE_URL, is_sqlite
+
+# Межпроцессная блокировка записи для SQLite: в каждый момент пишет один воркер,
+# поэтому воркеры не упираются в "database is locked". Чтения идут без блокировки.
+WRITE_LOCK = os.getenv('WRITE_LOCK', '0') == '1'
+# Сколько записей своего процесса воркер выполняет подряд, прежде чем отдать блокировку другим
+WRITE_BATCH_SIZE = int(os.getenv('WRITE_BATCH_SIZE', '32'))
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+def write_lock_path(url=DATABASE_URL):
+    database = make_url(url).database
+    if not is_sqlite(url) or database in (None, '', ':memory:'):
+        return None
+    return f'{database}.write-lock'
+
+
+# flock на файле рядом с базой + очередь записей процесса.
+# Пока в процессе есть ожидающие записи, flock не отпускается (не дольше WRITE_BATCH_SIZE записей подряд):
+# один системный вызов и одно ожидание на пачку записей вместо каждого запроса.
+class ProcessWriteLock:
+    def __init__(self, path, max_batch=WRITE_BATCH_SIZE, poll_interval=0.001, max_poll_interval=0.02):
+        self.path = path
+        self.max_batch = max_batch
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._fd = None
+        self._queue = asyncio.Lock()
+        self._waiting = 0
+        self._held = False
+        self._batch = 0
+
+    def _flock(self):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    async def acquire(self):
+        # flock принадлежит открытому файлу, а не корутине: внутри процесса порядок задает asyncio.Lock
+        self._waiting += 1
+        try:
+            await self._queue.acquire()
+        except BaseException:
+            self._waiting -= 1
+            # Отменили последнего ожидающего, которому оставили flock
+            if self._held and self._waiting == 0 and not self._queue.locked():
+                self._unlock()
+            raise
+        self._waiting -= 1
+        try:
+            if not self._held:
+                # Опрос без блокирующего вызова: отмена запроса не оставит захваченный flock
+                interval = self.poll_interval
+                while not self._flock():
+                    await asyncio.sleep(interval)
+                    interval = min(interval * 2, self.max_poll_interval)
+                self._held = True
+                self._batch = 0
+        except BaseException:
+            self._queue.release()
+            raise
+        self._batch += 1
+
+    def _unlock(self):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._held = False
+
+    def release(self):
+        if self._held and (self._waiting == 0 or self._batch >= self.max_batch):
+            self._unlock()
+        self._queue.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+
+# Запросы на запись выполняются под блокировкой; она снимается, как только
+# обработчик закончил (начало ответа), а не после отправки всего тела клиенту.
+# exclude - пары (метод, regex пути), которые берут блокировку сами
+class WriteLockMiddleware:
+    def __init__(self, app, lock=None, methods=WRITE_METHODS, exclude=()):
+        self.app = app
+        self.lock = lock or ProcessWriteLock(write_lock_path())
+        self.methods = methods
+        self.exclude = [(method, re.compile(pattern)) for method, pattern in exclude]
+
+    def _excluded(self, scope):
+        return any(scope['method'] == method and pattern.match(scope['path']) for method, pattern in self.exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] not in self.methods or self._excluded(scope):
+            await self.app(scope, receive, send)
+            return
+
+        await self.lock.acquire()
+        locked = True
+
+        async def send_and_release(message):
+            nonlocal locked
+            if locked and message['type'] == 'http.response.start':
+                locked = False
+                self.lock.release()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_release)
+        finally:
+            if locked:
+                self.lock.release()